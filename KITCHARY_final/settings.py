@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os 
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,6 +50,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last: under WSGI, swaps the async views for their sync twins
+    'core.middleware.SyncViewsUnderWSGIMiddleware',
 ]
 
 ROOT_URLCONF = 'KITCHARY_final.urls'
@@ -72,14 +75,105 @@ TEMPLATES = [
 WSGI_APPLICATION = 'KITCHARY_final.wsgi.application'
 
 
+def env_flag(name, default, environ=os.environ):
+    return environ.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+# Under WSGI, serve the async views with their sync twins
+# (core.middleware.SyncViewsUnderWSGIMiddleware); 0 runs them through async_to_sync
+WSGI_SYNC_VIEWS = env_flag('KITCHARY_WSGI_SYNC_VIEWS', True)
+
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+def database_settings(environ=os.environ):
+    """DATABASES as configured by the KITCHARY_DB_* and KITCHARY_SQLITE_TUNING variables"""
+    # KITCHARY_DB_ENGINE=postgresql switches to PostgreSQL, configured by the
+    # KITCHARY_DB_NAME/USER/PASSWORD/HOST/PORT variables
+    engine = environ.get('KITCHARY_DB_ENGINE', 'sqlite3')
+    if engine == 'postgresql':
+        default = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('KITCHARY_DB_NAME', 'kitchary'),
+            'USER': environ.get('KITCHARY_DB_USER', 'kitchary'),
+            'PASSWORD': environ.get('KITCHARY_DB_PASSWORD', ''),
+            'HOST': environ.get('KITCHARY_DB_HOST', 'localhost'),
+            'PORT': environ.get('KITCHARY_DB_PORT', '5432'),
+        }
+    else:
+        default = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # Overridable so benchmarks and load tests can point servers at a scratch copy
+            'NAME': environ.get('KITCHARY_DB_PATH', BASE_DIR / 'db.sqlite3'),
+            # A file, not the default shared-cache in-memory database, so threaded
+            # tests wait on locks (busy timeout) like real connections do
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+
+    # Connection reuse, opt-in for WSGI servers. Seconds a connection is kept
+    # open between requests (0 = close after every request, as Django does by
+    # default); health checks ping a reused connection before the request so a
+    # dropped one is replaced instead of failing the request. Keep 0 under ASGI:
+    # async views run the ORM in a thread per request, so persistent connections
+    # pile up instead of being reused (use KITCHARY_DB_POOL there).
+    default['CONN_MAX_AGE'] = int(environ.get('KITCHARY_DB_CONN_MAX_AGE', '0'))
+    default['CONN_HEALTH_CHECKS'] = env_flag('KITCHARY_DB_CONN_HEALTH_CHECKS', True, environ)
+
+    # KITCHARY_DB_POOL=1 (PostgreSQL only, needs psycopg[pool]) shares a pool of
+    # connections between threads instead of one persistent connection each
+    if engine == 'postgresql' and env_flag('KITCHARY_DB_POOL', False, environ):
+        default['CONN_MAX_AGE'] = 0  # the pool owns connection lifetime
+        default['OPTIONS'] = {
+            'pool': {
+                'min_size': int(environ.get('KITCHARY_DB_POOL_MIN', '2')),
+                'max_size': int(environ.get('KITCHARY_DB_POOL_MAX', '10')),
+                'timeout': int(environ.get('KITCHARY_DB_POOL_TIMEOUT', '10')),
+            },
+        }
+
+    # Take the write lock at BEGIN: a deferred transaction that reads and then
+    # writes can't wait for the lock and fails immediately under contention
+    if engine == 'sqlite3' and env_flag('KITCHARY_SQLITE_TUNING', True, environ):
+        default['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+    return {'default': default}
+
+
+DB_ENGINE = os.environ.get('KITCHARY_DB_ENGINE', 'sqlite3')
+DATABASES = database_settings()
+
+# SQLite performance profile, applied to every new connection by core.db.
+# KITCHARY_SQLITE_TUNING=0 falls back to SQLite's defaults (rollback journal,
+# synchronous=FULL, small page cache, deferred transactions; see database_settings).
+SQLITE_TUNING = DB_ENGINE == 'sqlite3' and env_flag('KITCHARY_SQLITE_TUNING', True)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers don't block the writer and vice versa
+    'synchronous': 'NORMAL',        # safe with WAL; fsync at checkpoints, not every commit
+    'busy_timeout': 5000,           # ms to wait for a lock before "database is locked"
+    'mmap_size': 256 * 1024 * 1024, # read pages through the OS page cache
+    'cache_size': -64 * 1024,       # negative = KiB, so 64 MB of page cache per connection
+    'temp_store': 'MEMORY',         # sorts and temp B-trees stay off disk
+} if SQLITE_TUNING else {}
+
+
+# Caches (used through core.cache)
+# 'default' is per process: a locmem LRU, the cheapest place to keep hot values.
+# 'shared' is on disk, so every worker process on this host sees the same
+# entries, namespace versions and recompute locks.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kitchary-local',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('KITCHARY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kitchary-cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
 
@@ -126,6 +220,17 @@ STATIC_URL = '/static/'
 # Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Encode the resized menu image copies in a thread after the upload commits;
+# off, they are encoded in the request once the transaction commits
+MENU_IMAGE_VARIANTS_IN_BACKGROUND = True
+
+# Media serving (core.media.serve_media)
+MEDIA_CACHE_MAX_AGE = 60 * 60  # plain names can be overwritten in place
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365  # content-hashed URLs never change
+# 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache) hands the transfer to the
+# front-end server; the prefix is its internal location for MEDIA_ROOT
+MEDIA_SENDFILE_HEADER = os.environ.get('KITCHARY_MEDIA_SENDFILE_HEADER', '')
+MEDIA_SENDFILE_PREFIX = os.environ.get('KITCHARY_MEDIA_SENDFILE_PREFIX', '/protected-media/')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
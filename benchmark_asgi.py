@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+WSGI vs ASGI benchmark for KITCHARY
+Seeds a scratch SQLite database, then serves it with one single-process
+WSGI server (gunicorn, gthread) and one single-process ASGI server
+(uvicorn) in turn and drives the async pages (menu, orders, payments,
+admin dashboard) with many concurrent clients. With --slow-ms each client
+trickles its request headers, like a phone on a bad connection: a threaded
+WSGI worker holds a thread per slow client, the ASGI event loop does not.
+
+Under WSGI it runs twice: with the pages' sync twins (the default) and
+with KITCHARY_WSGI_SYNC_VIEWS=0, which runs the async views through
+async_to_sync, to show what the twins save.
+
+Requires: pip install gunicorn uvicorn
+
+Usage: python benchmark_asgi.py [--concurrency 100] [--requests 2000] [--slow-ms 200]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'KITCHARY_final.settings')
+
+PAGES = ['/menu/', '/orders/', '/payments/', '/dashboard/admin/']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=100, help='simultaneous clients')
+    parser.add_argument('--requests', type=int, default=2_000, help='requests per server')
+    parser.add_argument('--slow-ms', type=int, default=0, help='delay while sending each request (slow clients)')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn worker threads')
+    parser.add_argument('--orders', type=int, default=200, help='orders seeded for the benchmark user')
+    parser.add_argument('--port', type=int, default=8765)
+    return parser.parse_args()
+
+
+def seed(path, orders):
+    """Create the scratch database and return a session cookie for an admin user"""
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+
+    from core.menu_cache import get_menu
+    from core.models import MenuItem
+    from core.services import create_order
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_superuser(username='bench_admin', password='!')
+    MenuItem.objects.bulk_create([MenuItem(name=f'Bench Dish {i}', price=Decimal(100 + i)) for i in range(30)])
+    menu = get_menu().by_id
+    ids = list(menu)
+    for i in range(orders):
+        create_order(user, {ids[i % len(ids)]: 1, ids[(i * 7) % len(ids)]: 2}, menu)
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def server_commands(args):
+    """(label, command, extra environment) for each server to benchmark"""
+    bind = f'127.0.0.1:{args.port}'
+    gunicorn = ['gunicorn', 'KITCHARY_final.wsgi:application', '--bind', bind,
+                '--workers', '1', '--threads', str(args.threads), '--worker-class', 'gthread',
+                '--log-level', 'warning']
+    return [
+        ('WSGI (gunicorn, 1 worker, %d threads), sync views' % args.threads,
+         gunicorn, {'KITCHARY_WSGI_SYNC_VIEWS': '1'}),
+        ('WSGI (gunicorn, 1 worker, %d threads), async views via async_to_sync' % args.threads,
+         gunicorn, {'KITCHARY_WSGI_SYNC_VIEWS': '0'}),
+        ('ASGI (uvicorn, 1 worker)',
+         ['uvicorn', 'KITCHARY_final.asgi:application', '--host', '127.0.0.1',
+          '--port', str(args.port), '--workers', '1', '--log-level', 'warning', '--no-access-log'],
+         {}),
+    ]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+async def fetch(port, path, cookie, slow_ms):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'.encode())
+        await writer.drain()
+        if slow_ms:
+            await asyncio.sleep(slow_ms / 1000)
+        writer.write(f'Cookie: {cookie}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def drive(args, cookie):
+    latencies = []
+    errors = 0
+    remaining = iter(range(args.requests))
+
+    async def client():
+        nonlocal errors
+        for n in remaining:
+            started = time.perf_counter()
+            try:
+                status = await fetch(args.port, PAGES[n % len(PAGES)], cookie, args.slow_ms)
+            except OSError:
+                status = None
+            if status != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def report(label, elapsed, latencies, errors):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"\n===== {label} =====")
+    print(f"  throughput: {len(latencies) / elapsed:8.1f} req/s")
+    print(f"  latency:    p50 {statistics.median(latencies) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms")
+    print(f"  errors:     {errors}")
+
+
+def main():
+    args = parse_args()
+    missing = [name for name in ('gunicorn', 'uvicorn') if shutil.which(name) is None]
+    if missing:
+        sys.exit(f"Missing servers: {', '.join(missing)} (pip install {' '.join(missing)})")
+
+    path = os.path.join(tempfile.gettempdir(), 'kitchary_bench_asgi.sqlite3')
+    if os.path.exists(path):
+        os.remove(path)
+    print(f"Seeding {args.orders} orders...")
+    cookie = seed(path, args.orders)
+
+    env = dict(os.environ, KITCHARY_DB_PATH=path)
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, {args.slow_ms} ms slow send")
+    try:
+        for label, command, extra_env in server_commands(args):
+            server = subprocess.Popen(command, cwd=BASE_DIR, env=dict(env, **extra_env))
+            try:
+                wait_for_port(args.port)
+                report(label, *asyncio.run(drive(args, cookie)))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
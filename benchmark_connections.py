@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Connection reuse benchmark for KITCHARY
+Times sequential requests to the menu and order history pages through
+Django's full request cycle (middleware, session, request_finished), with
+a new database connection per request (CONN_MAX_AGE=0), persistent
+connections with and without health checks, and, when running against
+PostgreSQL (KITCHARY_DB_ENGINE=postgresql), the psycopg connection pool.
+Every mode runs in its own process so the settings are read fresh; on
+SQLite each run gets a scratch database.
+
+Usage: python benchmark_connections.py [--requests 2000]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'KITCHARY_final.settings')
+
+MODES = {
+    'new connection per request': {'KITCHARY_DB_CONN_MAX_AGE': '0'},
+    'persistent, health checks': {'KITCHARY_DB_CONN_MAX_AGE': '60', 'KITCHARY_DB_CONN_HEALTH_CHECKS': '1'},
+    'persistent, no health checks': {'KITCHARY_DB_CONN_MAX_AGE': '60', 'KITCHARY_DB_CONN_HEALTH_CHECKS': '0'},
+}
+POOL_MODE = {'pooled (psycopg pool)': {'KITCHARY_DB_POOL': '1'}}
+PAGES = ['/menu/', '/orders/']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2_000, help='requests per mode')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def login_cookie(user):
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def run(args):
+    django.setup()
+
+    from wsgiref.util import setup_testing_defaults
+
+    from django.contrib.auth.models import User
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.management import call_command
+    from django.db import connection
+
+    from core.menu_cache import get_menu
+    from core.models import MenuItem
+    from core.services import create_order
+
+    call_command('migrate', verbosity=0)
+    user, _ = User.objects.get_or_create(username='bench_connections')
+    if not MenuItem.objects.exists():
+        MenuItem.objects.bulk_create([MenuItem(name=f'Bench Dish {i}', price=100 + i) for i in range(20)])
+    menu = get_menu().by_id
+    for item_id in list(menu)[:10]:
+        create_order(user, {item_id: 1}, menu)
+    cookie = login_cookie(user)
+    connection.close()
+
+    # Call the WSGI handler directly: unlike the test client it sends
+    # request_started/request_finished, which is where Django closes or
+    # keeps connections according to CONN_MAX_AGE
+    handler = WSGIHandler()
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    timings = []
+    for n in range(args.requests):
+        environ = {'PATH_INFO': PAGES[n % len(PAGES)], 'HTTP_COOKIE': cookie, 'HTTP_HOST': 'localhost'}
+        setup_testing_defaults(environ)
+        started = time.perf_counter()
+        response = handler(environ, start_response)
+        b''.join(response)
+        response.close()
+        timings.append(time.perf_counter() - started)
+        assert statuses[-1].startswith('200'), statuses[-1]
+
+    timings.sort()
+    print(f"\n===== {args.run} =====")
+    print(f"  mean {statistics.mean(timings) * 1000:6.2f} ms   "
+          f"p50 {statistics.median(timings) * 1000:6.2f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:6.2f} ms")
+
+
+def main():
+    args = parse_args()
+    if args.run:
+        run(args)
+        return
+
+    modes = dict(MODES)
+    postgres = os.environ.get('KITCHARY_DB_ENGINE') == 'postgresql'
+    if postgres:
+        modes.update(POOL_MODE)
+    print(f"{args.requests} requests per mode ({'PostgreSQL' if postgres else 'SQLite'})")
+    for label, overrides in modes.items():
+        env = dict(os.environ, **overrides)
+        path = None
+        if not postgres:
+            path = os.path.join(tempfile.gettempdir(), 'kitchary_bench_connections.sqlite3')
+            env['KITCHARY_DB_PATH'] = path
+        try:
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], '--run', label], env=env, check=True)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if path and os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Index benchmark for KITCHARY
+Seeds a scratch SQLite database with a large order history and prints the
+EXPLAIN QUERY PLAN output and timings for each view's queries, first without
+and then with the indexes declared in Meta.indexes on Order and Payment.
+The "without" run is not index-free: the foreign key indexes and the unique
+constraint on Payment.order stay in place (dropping a constraint rebuilds the
+table on SQLite, which brings the Meta indexes back with it).
+
+Usage: python benchmark_indexes.py [--orders 1000000] [--users 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'KITCHARY_final.settings')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000, help='number of orders to seed')
+    parser.add_argument('--users', type=int, default=2_000, help='number of customers to spread orders over')
+    parser.add_argument('--batch-size', type=int, default=10_000, help='rows per bulk insert')
+    parser.add_argument('--repeat', type=int, default=20, help='timed executions per query')
+    parser.add_argument('--db', help='scratch database path (default: a temporary file)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    return parser.parse_args()
+
+
+def setup_scratch_database(path):
+    """Point the default database at a scratch file before Django connects"""
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(args):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.utils import timezone
+
+    from core.models import MenuItem, Order, OrderItem, Payment
+
+    rng = random.Random(args.seed)
+    print(f"Seeding {args.users:,} users and {args.orders:,} orders...")
+    started = time.perf_counter()
+
+    User.objects.bulk_create(
+        [User(username=f'bench_user_{i}', password='!') for i in range(args.users)],
+        batch_size=args.batch_size,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    MenuItem.objects.bulk_create(
+        [MenuItem(name=f'Bench Dish {i}', price=Decimal(rng.randint(50, 500))) for i in range(50)]
+    )
+    menu_ids = list(MenuItem.objects.values_list('id', flat=True))
+
+    statuses = ['Completed'] * 9 + ['Pending']
+    now = timezone.now()
+    remaining = args.orders
+    # Spread timestamps over the last year so date ranges are selective;
+    # auto_now_add would otherwise stamp every row with the insert time.
+    created_at = Order._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    while remaining:
+        count = min(remaining, args.batch_size)
+        with transaction.atomic():
+            orders = Order.objects.bulk_create([
+                Order(
+                    user_id=rng.choice(user_ids),
+                    total_amount=Decimal(rng.randint(50, 2000)),
+                    created_at=now - timedelta(minutes=age),
+                    # Only the last hour's orders are still open in the kitchen
+                    status=rng.choice(Order.KITCHEN_STATUSES) if age < 60 else Order.SERVED,
+                )
+                for age in (rng.randint(0, 525_600) for _ in range(count))
+            ])
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menu_item_id=rng.choice(menu_ids), quantity=rng.randint(1, 3))
+                for order in orders
+            ])
+            Payment.objects.bulk_create([
+                Payment(user_id=order.user_id, order=order, amount=order.total_amount, status=rng.choice(statuses))
+                for order in orders
+            ])
+        remaining -= count
+        print(f"  {args.orders - remaining:,} / {args.orders:,}", end='\r', flush=True)
+    created_at.auto_now_add = True
+
+    print(f"\nSeeded in {time.perf_counter() - started:.1f}s")
+
+
+def view_queries():
+    """The queries each view issues, built the same way the views build them"""
+    from django.contrib.auth.models import User
+    from django.db.models import Sum
+    from django.utils import timezone
+
+    from core.models import Order, Payment
+
+    user = User.objects.order_by('id').first()
+    order = Order.objects.filter(user=user).order_by('-id').first()
+    week_ago = timezone.now() - timedelta(days=7)
+
+    return [
+        ('order_list', Order.objects.filter(user=user).with_payment_status().order_by('-created_at', '-id')[:21]),
+        ('payment_list', Payment.objects.filter(user=user).order_by('-payment_date', '-id')[:26]),
+        ('make_payment: payment lookup', Payment.objects.filter(order=order, user=user)),
+        ('make_payment: recent history', Payment.objects.filter(user=user).order_by('-payment_date', '-id')[:5]),
+        ('admin_dashboard: revenue', Payment.objects.filter(status='Completed').values('status').annotate(total=Sum('amount'))),
+        ('admin_dashboard: pending count', Payment.objects.filter(status='Pending').values('id')),
+        ('admin_dashboard: recent orders', Order.objects.order_by('-created_at')[:5]),
+        ('kitchen_queue: placed column', Order.objects.kitchen_queue(Order.PLACED)[:20]),
+        ('OrderAdmin: created_at filter', Order.objects.filter(created_at__gte=week_ago).order_by('-created_at')[:100]),
+        ('PaymentAdmin: status filter', Payment.objects.filter(status='Pending').order_by('-payment_date')[:100]),
+    ]
+
+
+def report(label, repeat):
+    print(f"\n===== {label} =====")
+    for name, queryset in view_queries():
+        plan = queryset.explain()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        print(f"\n-- {name} ({elapsed:.2f} ms)")
+        for line in plan.splitlines():
+            print(f"   {line}")
+
+
+def set_indexes(enabled):
+    """Drop or (re)create the indexes declared in Meta.indexes on Order and Payment"""
+    from django.db import connection
+
+    from core.models import Order, Payment
+
+    with connection.schema_editor() as editor:
+        for model in (Order, Payment):
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def remove_database(path):
+    """Delete a SQLite database along with its WAL-mode side files"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def main():
+    args = parse_args()
+    path = args.db or os.path.join(tempfile.gettempdir(), 'kitchary_bench_indexes.sqlite3')
+    remove_database(path)
+
+    setup_scratch_database(path)
+    seed(args)
+
+    set_indexes(False)
+    report('WITHOUT Meta.indexes (foreign key and unique constraint indexes kept)', args.repeat)
+    set_indexes(True)
+    report('WITH indexes', args.repeat)
+
+    if not args.db:
+        from django.db import connection
+
+        connection.close()
+        remove_database(path)
+
+
+if __name__ == '__main__':
+    main()
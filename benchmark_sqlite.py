@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+SQLite tuning benchmark for KITCHARY
+Places orders from many threads at once (core.services.create_order, the
+same code path as the place_order view) while other threads keep reading
+order history, once with SQLite's defaults and once with the tuned profile
+from settings.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout, mmap,
+cache_size, temp_store, IMMEDIATE transactions). Each run uses its own
+scratch database and process, so the settings are read fresh.
+
+Usage: python benchmark_sqlite.py [--writers 8] [--readers 4] [--orders 200]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'KITCHARY_final.settings')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8, help='threads placing orders')
+    parser.add_argument('--readers', type=int, default=4, help='threads reading order history')
+    parser.add_argument('--orders', type=int, default=200, help='orders placed per writer thread')
+    parser.add_argument('--run', choices=['default', 'tuned'], help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def run(args):
+    """One measurement, in a process whose settings match the mode being measured"""
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import OperationalError, connections
+
+    from core.menu_cache import get_menu
+    from core.models import MenuItem, Order
+    from core.services import create_order
+
+    call_command('migrate', verbosity=0)
+    MenuItem.objects.bulk_create([MenuItem(name=f'Bench Dish {i}', price=100 + i) for i in range(20)])
+    users = [User.objects.create_user(username=f'bench_{i}') for i in range(args.writers)]
+    menu = get_menu().by_id
+    ids = list(menu)
+    connections.close_all()
+
+    placed, locked, reads = [0], [0], [0]
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def writer(user):
+        try:
+            for i in range(args.orders):
+                try:
+                    create_order(user, {ids[i % len(ids)]: 1, ids[(i * 3) % len(ids)]: 2}, menu)
+                    count = placed
+                except OperationalError:
+                    count = locked
+                with lock:
+                    count[0] += 1
+        finally:
+            connections.close_all()
+
+    def reader(user):
+        try:
+            while writing.is_set():
+                try:
+                    list(Order.objects.filter(user=user).with_payment_status().order_by('-created_at')[:20])
+                    with lock:
+                        reads[0] += 1
+                except OperationalError:
+                    pass
+        finally:
+            connections.close_all()
+
+    writers = [threading.Thread(target=writer, args=(user,)) for user in users]
+    readers = [threading.Thread(target=reader, args=(users[i % len(users)],)) for i in range(args.readers)]
+    started = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writing.clear()
+    for thread in readers:
+        thread.join()
+
+    print(f"\n===== {'tuned' if args.run == 'tuned' else 'SQLite defaults'} =====")
+    print(f"  orders placed:   {placed[0]:6d}  ({placed[0] / elapsed:7.1f} orders/s)")
+    print(f"  'locked' errors: {locked[0]:6d}")
+    print(f"  history reads:   {reads[0]:6d}  ({reads[0] / elapsed:7.1f} reads/s)")
+
+
+def main():
+    args = parse_args()
+    if args.run:
+        run(args)
+        return
+
+    print(f"{args.writers} writers x {args.orders} orders, {args.readers} readers")
+    for mode in ('default', 'tuned'):
+        path = os.path.join(tempfile.gettempdir(), f'kitchary_bench_sqlite_{mode}.sqlite3')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        env = dict(
+            os.environ,
+            KITCHARY_DB_PATH=path,
+            KITCHARY_SQLITE_TUNING='1' if mode == 'tuned' else '0',
+        )
+        try:
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], '--run', mode], env=env, check=True)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
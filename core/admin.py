@@ -29,20 +29,25 @@ class MenuItemAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'total_amount', 'created_at', 'payment_status']
-    list_filter = ['created_at']
+    list_display = ['id', 'user', 'total_amount', 'created_at', 'status', 'payment_status']
+    list_filter = ['status', 'created_at']
     search_fields = ['user__username', 'id']
     readonly_fields = ['created_at']
-    
+
+    def get_queryset(self, request):
+        # Annotate the latest payment status so the changelist doesn't query per row
+        return super().get_queryset(request).select_related('user').with_payment_status()
+
     def payment_status(self, obj):
-        payment = obj.payment_set.first()
-        if payment:
-            if payment.status == 'Completed':
+        status = obj.latest_payment_status
+        if status:
+            if status == 'Completed':
                 return format_html('<span style="color: green;">✅ Paid</span>')
             else:
                 return format_html('<span style="color: orange;">⏳ Pending</span>')
         return format_html('<span style="color: red;">❌ No Payment</span>')
     payment_status.short_description = 'Payment Status'
+    payment_status.admin_order_field = 'latest_payment_status'
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -51,12 +56,18 @@ class PaymentAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'order__id']
     readonly_fields = ['payment_date']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'order__user')
+
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'menu_item', 'quantity']
     list_filter = ['menu_item']
     search_fields = ['order__id', 'menu_item__name']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('order__user', 'menu_item')
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'role']
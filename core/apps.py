@@ -3,3 +3,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register the MenuItem signal handlers that keep the menu cache fresh
+        from . import menu_cache  # noqa: F401
+        # ...and the Order/Payment/MenuItem handlers that maintain the dashboard rollup
+        from . import stats  # noqa: F401
+        # ...and the ones that publish order/payment changes to live /events/ streams
+        from . import events  # noqa: F401
+        # ...and the OrderItem handlers that keep Order.updated_at (conditional GET) current
+        from . import conditional  # noqa: F401
+        # ...and the SQLite pragmas (WAL, busy timeout, ...) applied to new connections
+        from . import db  # noqa: F401
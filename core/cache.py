@@ -0,0 +1,180 @@
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Cache aliases, see CACHES in settings
+LOCAL = 'default'  # per process, LRU
+SHARED = 'shared'  # on disk, shared by every worker process on the host
+
+DEFAULT_TTL = 300
+# Longest a process may hold a recompute lock before waiters compute anyway
+LOCK_TTL = 30
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+# Striped locks for in-process single flight (one compute per key at a time)
+_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def local_cache():
+    return caches[LOCAL]
+
+
+def shared_cache():
+    return caches[SHARED]
+
+
+def _namespace_key(namespace):
+    return f'ns:{namespace}'
+
+
+def namespace_version(namespace):
+    """Current version of ``namespace``, read from the shared tier.
+
+    A missing version (never set, or culled from the file cache) starts
+    at the current time in microseconds rather than 1, so it can never
+    make entries from an earlier version reachable again.
+    """
+    cache = shared_cache()
+    key = _namespace_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_namespace(namespace):
+    """Invalidate every key in ``namespace``, in all processes and both tiers"""
+    cache = shared_cache()
+    key = _namespace_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        namespace_version(namespace)
+        return cache.incr(key)
+
+
+def make_key(key, namespace=None):
+    if namespace is None:
+        return key
+    return f'{namespace}:{namespace_version(namespace)}:{key}'
+
+
+def _lock_path(full_key):
+    directory = os.path.join(settings.CACHES[SHARED]['LOCATION'], 'locks')
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.md5(full_key.encode(), usedforsecurity=False).hexdigest()
+    return os.path.join(directory, f'{name}.lock')
+
+
+def _acquire_file_lock(path):
+    """Create the lock file at ``path``; O_EXCL makes this atomic across processes"""
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        pass
+    try:
+        stale = time.time() - os.path.getmtime(path) > LOCK_TTL
+    except FileNotFoundError:
+        return False  # just released: the next poll takes it
+    if stale:
+        # Its holder died without releasing it: remove it, the next poll takes it
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return False
+
+
+def _fill_shared(full_key, compute, ttl, lock_path, locked):
+    """Compute and store ``full_key`` unless another process already has, then release the lock file if held"""
+    cache = shared_cache()
+    try:
+        value = cache.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            cache.set(full_key, value, ttl)
+        return value
+    finally:
+        if locked:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+
+def _wait_for_shared(full_key, compute, ttl, lock_path):
+    """Wait for the process holding ``lock_path`` to store ``full_key``.
+
+    A waiter gives up after LOCK_TTL and computes anyway, and a lock left
+    by a crashed process is removed once it is LOCK_TTL old.
+    """
+    cache = shared_cache()
+    deadline = time.monotonic() + LOCK_TTL
+    locked = False
+    while not locked:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if time.monotonic() > deadline:
+            break  # the holder stalled
+        locked = _acquire_file_lock(lock_path)
+    return _fill_shared(full_key, compute, ttl, lock_path, locked)
+
+
+def get_or_compute(key, compute, ttl=DEFAULT_TTL, namespace=None, shared=True):
+    """Return the cached value for ``key``, calling ``compute()`` on a miss.
+
+    Values are looked up in the local tier, then (if ``shared``) the shared
+    tier, and kept in both. On a miss only one thread per process and (via
+    a lock file next to the shared tier) one process per host recomputes;
+    the others wait for its result, for up to LOCK_TTL seconds. Keys in a
+    ``namespace`` are dropped together by bump_namespace().
+    """
+    full_key = make_key(key, namespace)
+    local = local_cache()
+    value = local.get(full_key, _MISSING)
+    if value is not _MISSING:
+        return value
+    if shared:
+        value = shared_cache().get(full_key, _MISSING)
+        if value is not _MISSING:
+            local.set(full_key, value, ttl)
+            return value
+
+    with _LOCKS[zlib.crc32(full_key.encode()) % len(_LOCKS)]:
+        # Filled by another thread while this one waited for the lock
+        value = local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if not shared:
+            value = compute()
+            local.set(full_key, value, ttl)
+            return value
+        lock_path = _lock_path(full_key)
+        if _acquire_file_lock(lock_path):
+            value = _fill_shared(full_key, compute, ttl, lock_path, locked=True)
+            local.set(full_key, value, ttl)
+            return value
+
+    # Another process is recomputing: wait for its result rather than piling
+    # on, but outside the stripe lock, which unrelated keys share
+    value = _wait_for_shared(full_key, compute, ttl, lock_path)
+    local.set(full_key, value, ttl)
+    return value
+
+
+def delete(key, namespace=None):
+    """Drop ``key`` here and from the shared tier; other processes keep
+    their local copy until its TTL, so use bump_namespace() when that matters"""
+    full_key = make_key(key, namespace)
+    local_cache().delete(full_key)
+    shared_cache().delete(full_key)
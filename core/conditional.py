@@ -0,0 +1,106 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .menu_cache import get_menu_version
+from .models import Order, OrderItem, Payment
+
+
+def make_etag(request, user, parts):
+    """Hash the validators together with everything else the page depends on:
+    the URL (page cursor), the visitor and the CSRF secret its forms embed"""
+    raw = '|'.join(str(part) for part in (
+        request.get_full_path(),
+        user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *parts,
+    ))
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def check_page(request, user, validators):
+    """Run the validators for a GET: ``(not_modified, etag, timestamp)``, where
+    ``not_modified`` is a 304 response if the client's copy is current, else
+    None. All None when the page must render regardless."""
+    if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+        # Flash messages are shown once: that render can't be skipped
+        return None, None, None
+    parts, last_modified = validators(user)
+    etag = make_etag(request, user, parts)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp), etag, timestamp
+
+
+def finish_response(response, etag, timestamp):
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if timestamp:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+        # Personal pages: browsers may keep them, but must revalidate every time
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(validators):
+    """Answer a GET with 304 Not Modified when nothing the page shows has changed.
+
+    ``validators(user)`` runs before the view (in a thread for async views)
+    and returns ``(parts, last_modified)``: values that change whenever the
+    page would, and the time of the latest change (or None). The view only
+    runs when the client's ETag or Last-Modified no longer matches.
+    Works on sync and async views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                user = await request.auser()
+                not_modified, etag, timestamp = await sync_to_async(check_page)(request, user, validators)
+                response = not_modified if not_modified is not None else await view(request, *args, **kwargs)
+                return finish_response(response, etag, timestamp)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                not_modified, etag, timestamp = check_page(request, request.user, validators)
+                response = not_modified if not_modified is not None else view(request, *args, **kwargs)
+                return finish_response(response, etag, timestamp)
+        return inner
+    return decorator
+
+
+def payment_validators(user):
+    # Index-only scan of payment_user_updated_idx; any saved change (status too) moves updated_at
+    payments = Payment.objects.filter(user=user).aggregate(last=Max('updated_at'), count=Count('id'))
+    return [payments['last'], payments['count']], payments['last']
+
+
+def order_validators(user):
+    # Index-only scan of order_user_updated_idx; status changes and line item
+    # edits (touch_order below) move updated_at
+    orders = Order.objects.filter(user=user).aggregate(last=Max('updated_at'), count=Count('id'))
+    payment_parts, _ = payment_validators(user)
+    # Line items show the menu item's current name and price. Menu edits carry
+    # no timestamp, so this page revalidates by ETag only (no Last-Modified).
+    parts = [orders['last'], orders['count'], *payment_parts, get_menu_version()]
+    return parts, None
+
+
+def menu_validators(user):
+    return [get_menu_version()], None
+
+
+# ---------- Signals keeping Order.updated_at current ----------
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def touch_order(sender, instance, **kwargs):
+    """A line item edit (e.g. in the admin) changes its order's pages too"""
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
@@ -0,0 +1,33 @@
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# PRAGMA values are interpolated into SQL, so only plain words and integers are allowed
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^(-?\d+|[A-Za-z]+)$')
+
+
+def pragma_statements(pragmas):
+    """The PRAGMA statements for a {name: value} mapping, validated"""
+    statements = []
+    for name, value in pragmas.items():
+        value = str(value)
+        if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(value):
+            raise ValueError(f"Invalid SQLite pragma: {name}={value}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+# ---------- Signals for SQLite tuning ----------
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
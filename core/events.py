@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Order, Payment
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+# Events buffered per connection; a client this far behind loses the oldest
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def _offer(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class Broker:
+    """In-process pub/sub of order and payment events, keyed by user id.
+
+    Each subscriber is an asyncio.Queue owned by the event loop that
+    serves its stream; publishers may run on any thread and hand events
+    over with call_soon_threadsafe. Only subscribers in the same process
+    see an event, so every worker serving /events/ must also be the one
+    handling the writes (e.g. a single ASGI process).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user id -> {queue: loop}
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(user_id, None)
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The loop has shut down; its stream's finally block will unsubscribe
+                pass
+
+
+broker = Broker()
+
+
+def publish_on_commit(user_id, event):
+    """Publish ``event`` once the current transaction commits (now, outside one)"""
+    if broker.has_subscribers(user_id):
+        transaction.on_commit(lambda: broker.publish(user_id, event))
+
+
+def order_event(order):
+    return {'type': 'order', 'order_id': order.pk, 'status': order.status}
+
+
+def payment_event(payment):
+    return {'type': 'payment', 'payment_id': payment.pk, 'order_id': payment.order_id, 'status': payment.status}
+
+
+def format_event(event):
+    """Serialise an event in the text/event-stream wire format"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(user_id):
+    """Yield a user's events as SSE messages until the client disconnects"""
+    queue = broker.subscribe(user_id)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+# ---------- Signals for live updates ----------
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, **kwargs):
+    publish_on_commit(instance.user_id, order_event(instance))
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, **kwargs):
+    publish_on_commit(instance.user_id, payment_event(instance))
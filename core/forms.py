@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import MenuItem
+from .menu_cache import get_menu
 
 # --- Custom User Signup Form ---
 class CustomUserCreationForm(UserCreationForm):
@@ -13,10 +13,10 @@ class CustomUserCreationForm(UserCreationForm):
 class OrderForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super(OrderForm, self).__init__(*args, **kwargs)
-        menu_items = MenuItem.objects.all()
+        self.menu = get_menu()
         self._menu_items = {}
         
-        for item in menu_items:
+        for item in self.menu.items:
             field_name = f'item_{item.id}'
             self._menu_items[field_name] = item
             self.fields[field_name] = forms.IntegerField(
@@ -33,6 +33,17 @@ class OrderForm(forms.Form):
         """Get the menu item associated with a form field"""
         return self._menu_items.get(field.name)
 
+    def get_menu_items(self):
+        """Get the menu items this form was built from, keyed by id"""
+        return self.menu.by_id
+
+    def get_quantities(self):
+        """Get the cleaned quantity for each menu item, keyed by id"""
+        return {
+            item.id: self.cleaned_data.get(field_name)
+            for field_name, item in self._menu_items.items()
+        }
+
 class SignUpForm(UserCreationForm):
     email = forms.EmailField(required=True)
 
@@ -0,0 +1,181 @@
+import hashlib
+import io
+import os
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+# Widths (in pixels) of the resized copies generated for each menu image
+DERIVATIVE_WIDTHS = (160, 320, 640, 960)
+DERIVATIVE_DIR = 'menu_images/derived'
+
+# Bump when the encoding settings change so every image is re-encoded
+PIPELINE_VERSION = 2
+
+# Target size of an encoded copy, in bytes per pixel. Each format walks its
+# quality ladder from the top and keeps the first encoding within budget.
+BYTES_PER_PIXEL_BUDGET = 0.2
+
+# (key, Pillow format, MIME type, file extension, quality ladder, save options)
+# in order of preference; JPEG is the universal fallback and always kept.
+IMAGE_FORMATS = (
+    ('avif', 'AVIF', 'image/avif', 'avif', (63, 55, 47, 40), {'speed': 6}),
+    ('webp', 'WEBP', 'image/webp', 'webp', (82, 75, 68, 60), {'method': 6}),
+    ('jpeg', 'JPEG', 'image/jpeg', 'jpg', (82, 75, 68, 60), {'optimize': True, 'progressive': True}),
+)
+MIME_TYPES = {key: mime for key, _, mime, _, _, _ in IMAGE_FORMATS}
+
+
+def supported_formats():
+    """The IMAGE_FORMATS entries this Pillow build can encode"""
+    return [entry for entry in IMAGE_FORMATS if entry[0] == 'jpeg' or features.check(entry[0])]
+
+
+def content_digest(chunks):
+    """Return a short hash of image bytes and the pipeline version"""
+    digest = hashlib.sha256(f"v{PIPELINE_VERSION}:".encode())
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def file_digest(field_file):
+    """Return a short hash of an image's content and the pipeline version"""
+    field_file.open('rb')
+    try:
+        field_file.seek(0)
+        digest = content_digest(field_file.chunks())
+        field_file.seek(0)
+    finally:
+        if field_file._committed:
+            field_file.close()
+    return digest
+
+
+def derivative_name(source_name, digest, width, extension):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f"{DERIVATIVE_DIR}/{stem}-{digest}-{width}w.{extension}"
+
+
+def encode_within_budget(image, pil_format, qualities, options, budget):
+    """Encode at the highest quality that fits ``budget`` bytes, else the lowest"""
+    image = image.convert('RGB')
+    for quality in qualities:
+        buffer = io.BytesIO()
+        image.save(buffer, pil_format, quality=quality, **options)
+        data = buffer.getvalue()
+        if len(data) <= budget:
+            break
+    return data
+
+
+def generate_derivatives(field_file, digest):
+    """Write resized, re-encoded copies of ``field_file`` and return them as variants.
+
+    Every width gets a JPEG; AVIF and WebP copies are kept only where the
+    encoder is available and the result is smaller than the JPEG. Names
+    embed the digest, so a copy that already exists in storage is reused.
+    Widths wider than the source are skipped.
+    """
+    storage = field_file.storage
+    field_file.open('rb')
+    try:
+        field_file.seek(0)
+        source = Image.open(field_file)
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    except (UnidentifiedImageError, OSError):
+        return {}
+    finally:
+        field_file.seek(0)
+        if field_file._committed:
+            field_file.close()
+
+    formats = supported_formats()
+    variants = {key: [] for key, *_ in formats}
+    for width in DERIVATIVE_WIDTHS:
+        if width >= source.width:
+            break
+        height = round(source.height * width / source.width)
+        resized = None
+        budget = width * height * BYTES_PER_PIXEL_BUDGET
+        encoded = {}
+        # Encode the JPEG fallback first so the other formats can be compared to it
+        for key, pil_format, _, extension, qualities, options in reversed(formats):
+            name = derivative_name(field_file.name, digest, width, extension)
+            if storage.exists(name):
+                encoded[key] = (name, storage.size(name))
+                continue
+            if resized is None:
+                resized = source.resize((width, height), Image.Resampling.LANCZOS)
+            data = encode_within_budget(resized, pil_format, qualities, options, budget)
+            if key != 'jpeg' and len(data) >= encoded['jpeg'][1]:
+                continue
+            storage.save(name, ContentFile(data))
+            encoded[key] = (name, len(data))
+        for key, (name, _) in encoded.items():
+            variants[key].append([width, name])
+
+    return {key: entries for key, entries in variants.items() if entries}
+
+
+def delete_derivatives(storage, variants, keep=None):
+    """Remove the files of ``variants`` that are not also listed in ``keep``"""
+    keep = {name for entries in (keep or {}).values() for _, name in entries}
+    for entries in variants.values():
+        for _, name in entries:
+            if name not in keep:
+                storage.delete(name)
+
+
+def generate_variants_on_commit(item_id, stale_variants, generate=True):
+    """Once the current transaction commits, delete the copies of a replaced
+    image and generate the copies of menu item ``item_id``'s new one.
+
+    Encoding takes seconds, so it runs in a background thread (unless
+    MENU_IMAGE_VARIANTS_IN_BACKGROUND is off), outside any transaction and
+    without holding the database's write lock. Until it finishes the menu
+    serves the original image. Work lost to a restart is picked up by
+    ``manage.py sweep_menu_images``.
+    """
+    def start():
+        if settings.MENU_IMAGE_VARIANTS_IN_BACKGROUND:
+            threading.Thread(
+                target=refresh_menu_item_variants, args=(item_id, stale_variants, generate),
+                kwargs={'close_connection': True}, daemon=True,
+            ).start()
+        else:
+            refresh_menu_item_variants(item_id, stale_variants, generate)
+
+    transaction.on_commit(start)
+
+
+def refresh_menu_item_variants(item_id, stale_variants=None, generate=True, close_connection=False):
+    """Delete ``stale_variants``, then generate and store the copies of the item's image"""
+    from .menu_cache import invalidate_menu
+    from .models import MenuItem
+
+    try:
+        fields = ('image', 'image_available', 'image_digest', 'image_variants')
+        item = MenuItem.objects.filter(pk=item_id).only(*fields).first()
+        if item is None:
+            return
+        if stale_variants:
+            delete_derivatives(item.image.storage, stale_variants, keep=item.image_variants)
+        if not generate or not item.image or not item.image_available or not item.refresh_image_variants():
+            return
+        # Only store the copies if the image wasn't replaced while they were encoded
+        stored = MenuItem.objects.filter(pk=item_id, image=item.image.name).update(
+            image_digest=item.image_digest, image_variants=item.image_variants,
+        )
+        if stored:
+            # A queryset update sends no signals, so refresh the menu cache directly
+            invalidate_menu()
+        else:
+            delete_derivatives(item.image.storage, item.image_variants)
+    finally:
+        if close_connection:
+            connection.close()
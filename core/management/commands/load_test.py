@@ -0,0 +1,209 @@
+import http.client
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+IDEMPOTENCY_RE = re.compile(r'name="idempotency_key" value="([^"]+)"')
+ITEM_FIELD_RE = re.compile(r'name="(item_\d+)"')
+PAYMENT_PATH_RE = re.compile(r'^/payment/(\d+)/$')
+PASSWORD = 'Load-test-curry-42'
+
+
+class LoadTestError(Exception):
+    """A response that breaks the virtual user's flow"""
+
+
+class Stats:
+    """Latencies and errors per endpoint, shared by every virtual user"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.failures = []  # why each virtual user that gave up stopped
+        self.checkouts = 0
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    """One customer with their own cookies and keep-alive connection"""
+
+    def __init__(self, base_url, username, stats, timeout):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.hostname, url.port, timeout=timeout)
+        self.base_url = base_url
+        self.username = username
+        self.stats = stats
+        self.cookies = {}
+
+    def request(self, endpoint, method, path, data=None, expect=200):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            # Django's CSRF check wants a same-origin Referer over HTTPS
+            headers['Referer'] = self.base_url + path
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException) as exc:
+            self.connection.close()
+            self.stats.record(endpoint, time.perf_counter() - started, ok=False)
+            raise LoadTestError(f"{endpoint}: {exc}") from exc
+        ok = response.status == expect
+        self.stats.record(endpoint, time.perf_counter() - started, ok)
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value and morsel['max-age'] != '0':
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)  # deleted, e.g. flash messages once shown
+        if not ok:
+            raise LoadTestError(f"{endpoint}: HTTP {response.status}")
+        return response, content
+
+    def form(self, endpoint, path):
+        _, content = self.request(endpoint, 'GET', path)
+        match = CSRF_RE.search(content)
+        if match is None:
+            raise LoadTestError(f"{endpoint}: no CSRF token on {path}")
+        return content, {'csrfmiddlewaretoken': match.group(1)}
+
+    def signup_and_login(self):
+        _, data = self.form('GET signup', '/signup/')
+        data.update(username=self.username, email=f'{self.username}@example.com',
+                    password1=PASSWORD, password2=PASSWORD, role='customer')
+        self.request('POST signup', 'POST', '/signup/', data, expect=302)
+
+        _, data = self.form('GET login', '/login/')
+        data.update(username=self.username, password=PASSWORD)
+        self.request('POST login', 'POST', '/login/', data, expect=302)
+
+    def checkout(self, n):
+        content, data = self.form('GET place_order', '/orders/place/')
+        fields = ITEM_FIELD_RE.findall(content)
+        if not fields:
+            raise LoadTestError("GET place_order: the menu is empty")
+        data['idempotency_key'] = IDEMPOTENCY_RE.search(content).group(1)
+        # Two dishes per order, spread over the menu
+        data[fields[(n * 7 + 3) % len(fields)]] = 2
+        data[fields[n % len(fields)]] = 1
+        response, _ = self.request('POST place_order', 'POST', '/orders/place/', data, expect=302)
+
+        payment_path = urlsplit(response.headers['Location']).path
+        if not PAYMENT_PATH_RE.match(payment_path):
+            raise LoadTestError(f"POST place_order: redirected to {payment_path}")
+        content, data = self.form('GET payment', payment_path)
+        data['idempotency_key'] = IDEMPOTENCY_RE.search(content).group(1)
+        self.request('POST payment', 'POST', payment_path, data, expect=302)
+        with self.stats.lock:
+            self.stats.checkouts += 1
+
+    def run(self, checkouts):
+        try:
+            self.signup_and_login()
+            for n in range(checkouts):
+                self.checkout(n)
+        except LoadTestError as exc:
+            # Already counted as an error; this user stops, the others carry on
+            with self.stats.lock:
+                self.stats.failures.append(f"{self.username}: {exc}")
+        finally:
+            self.connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server (runserver, gunicorn or uvicorn) with virtual customers "
+        "that sign up, log in, then place and pay for orders, and report throughput, "
+        "latency percentiles and error rates per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='base URL of the server under test')
+        parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+        parser.add_argument('--checkouts', type=int, default=10, help='orders each user places and pays for')
+        parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for each response')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['checkouts'] < 0:
+            raise CommandError("--users must be at least 1 and --checkouts at least 0")
+        base_url = options['url'].rstrip('/')
+        if urlsplit(base_url).scheme not in ('http', 'https'):
+            raise CommandError(f"--url must be an http(s) URL, not {options['url']!r}")
+
+        stats = Stats()
+        run_id = uuid.uuid4().hex[:8]
+        users = [
+            VirtualUser(base_url, f'load_{run_id}_{i}', stats, options['timeout'])
+            for i in range(options['users'])
+        ]
+        threads = [threading.Thread(target=user.run, args=(options['checkouts'],)) for user in users]
+
+        self.stdout.write(
+            f"{options['users']} users x {options['checkouts']} checkouts against {base_url}"
+        )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.report(stats, elapsed)
+
+    def report(self, stats, elapsed):
+        self.stdout.write(
+            f"\n{'endpoint':<18} {'requests':>8} {'errors':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        total_requests = total_errors = 0
+        for endpoint, latencies in stats.latencies.items():
+            latencies = sorted(latencies)
+            errors = stats.errors[endpoint]
+            total_requests += len(latencies)
+            total_errors += errors
+            self.stdout.write(
+                f"{endpoint:<18} {len(latencies):>8} {errors:>7} {len(latencies) / elapsed:>8.1f} "
+                f"{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                f"{percentile(latencies, 0.99) * 1000:>8.1f}"
+            )
+
+        for failure in stats.failures[:5]:
+            self.stdout.write(self.style.ERROR(f"  {failure}"))
+        if len(stats.failures) > 5:
+            self.stdout.write(self.style.ERROR(f"  ... and {len(stats.failures) - 5} more users stopped early"))
+
+        error_rate = total_errors / total_requests if total_requests else 0
+        summary = (
+            f"\n{stats.checkouts} checkouts in {elapsed:.1f}s ({stats.checkouts / elapsed:.1f} checkouts/s), "
+            f"{total_requests} requests ({total_requests / elapsed:.1f} req/s), "
+            f"error rate {error_rate:.2%}"
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not total_errors else self.style.WARNING(summary))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the admin dashboard totals from the order, payment and menu "
+        "tables; run after bulk imports or raw SQL that bypass model signals"
+    )
+
+    def handle(self, *args, **options):
+        stats = rebuild_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(f"Dashboard stats rebuilt: {stats}"))
@@ -0,0 +1,263 @@
+import itertools
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.menu_cache import invalidate_menu
+from core.models import MenuItem, Order, OrderItem, Payment, UserProfile
+from core.stats import rebuild_dashboard_stats
+
+# The accounts and dishes the README's walkthrough uses
+DEMO_USERS = [
+    # username, password, email, superuser, role
+    ('admin', 'admin123', 'admin@kitchary.com', True, 'admin'),
+    ('customer', 'customer123', 'customer@test.com', False, 'customer'),
+]
+DEMO_MENU = [
+    ('Margherita Pizza', 'Classic pizza with tomato sauce, mozzarella, and basil', '12.99'),
+    ('Chicken Biryani', 'Aromatic rice dish with tender chicken and spices', '15.99'),
+    ('Caesar Salad', 'Fresh romaine lettuce with caesar dressing and croutons', '8.99'),
+    ('Beef Burger', 'Juicy beef patty with lettuce, tomato, and cheese', '11.99'),
+    ('Pasta Carbonara', 'Creamy pasta with bacon, eggs, and parmesan cheese', '13.99'),
+    ('Fish and Chips', 'Crispy battered fish with golden french fries', '14.99'),
+]
+
+# Generated dishes are "<style> <base>", e.g. "Smoky Paneer Tikka"
+DISH_STYLES = [
+    'Classic', 'Smoky', 'Spicy', 'Tandoori', 'Butter', 'Garlic', 'Masala', 'Crispy',
+    'Hyderabadi', 'Kerala', 'Punjabi', 'Chettinad', 'Malai', 'Achari', 'Kadai', 'Lemon',
+]
+DISH_BASES = [
+    'Paneer Tikka', 'Chicken Biryani', 'Veg Biryani', 'Dal Makhani', 'Chole', 'Naan',
+    'Dosa', 'Idli', 'Samosa', 'Pav Bhaji', 'Fish Curry', 'Mutton Rogan Josh', 'Pizza',
+    'Aloo Gobi', 'Palak Paneer', 'Pulao', 'Kulfi', 'Gulab Jamun', 'Lassi', 'Chai',
+]
+
+# Orders per hour of the day: a lunch and a bigger dinner rush
+HOUR_WEIGHTS = [1, 1, 0, 0, 0, 1, 2, 4, 6, 5, 5, 8, 16, 18, 12, 6, 5, 7, 12, 20, 22, 16, 8, 3]
+WEEKEND_WEIGHT = 1.4
+# Dishes per order and quantity per dish
+DISHES_PER_ORDER = ([1, 2, 3, 4], [45, 30, 15, 10])
+QUANTITIES = ([1, 2, 3], [75, 20, 5])
+# Orders this recent are still in the kitchen, and half of them are unpaid
+OPEN_ORDER_AGE = timedelta(hours=2)
+UNPAID_RATE = 0.03  # older orders that were never paid
+NO_PAYMENT_RATE = 0.02  # orders abandoned before the payment page
+
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative weights for a long tail: rank 1 is by far the most popular"""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+@contextmanager
+def historical_timestamps():
+    """Let bulk_create keep the generated timestamps instead of stamping now()"""
+    fields = [
+        Order._meta.get_field('created_at'),
+        Order._meta.get_field('updated_at'),
+        Payment._meta.get_field('payment_date'),
+        Payment._meta.get_field('timestamp'),
+        Payment._meta.get_field('updated_at'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the demo accounts and dishes, then bulk-generate customers, dishes "
+        "and an order history (line items and payments) with realistic time and "
+        "popularity distributions, for benchmarking at production scale"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000, help='customers to generate')
+        parser.add_argument('--menu-items', type=int, default=100, help='dishes to generate')
+        parser.add_argument('--orders', type=int, default=50_000, help='orders to generate')
+        parser.add_argument('--days', type=int, default=365, help='days of order history, ending now')
+        parser.add_argument('--batch-size', type=int, default=5_000, help='orders per transaction')
+        parser.add_argument('--password', default='customer123', help='password for every generated customer')
+        parser.add_argument('--seed', type=int, help='random seed, for repeatable data')
+
+    def handle(self, *args, **options):
+        for name in ('users', 'menu_items', 'orders', 'batch_size', 'days'):
+            if options[name] < (1 if name in ('batch_size', 'days') else 0):
+                raise CommandError(f"--{name.replace('_', '-')} is out of range")
+        if options['orders'] and not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError("Seeding orders needs a database that returns ids from bulk inserts")
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        self.create_demo_data()
+        users = self.create_users(options['users'], options['password'], options['days'])
+        menu = self.create_menu(options['menu_items'])
+        if options['orders']:
+            # The demo customer orders too, so its history pages have something to show
+            users.append(User.objects.get(username='customer').pk)
+            menu = menu + list(MenuItem.objects.filter(name__in=[name for name, _, _ in DEMO_MENU]))
+            self.create_orders(options['orders'], users, menu, options['days'], options['batch_size'])
+
+        # bulk_create sends no signals: bring the rollup and menu cache up to date
+        stats = rebuild_dashboard_stats()
+        invalidate_menu()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started:.1f}s. Dashboard totals: {stats.total_orders:,} orders, "
+            f"{stats.pending_payments:,} pending payments, {stats.menu_items:,} menu items"
+        ))
+
+    def create_demo_data(self):
+        for username, password, email, superuser, role in DEMO_USERS:
+            if User.objects.filter(username=username).exists():
+                continue
+            create = User.objects.create_superuser if superuser else User.objects.create_user
+            user = create(username=username, email=email, password=password)
+            UserProfile.objects.filter(user=user).update(role=role)
+            self.stdout.write(f"Created {username}/{password}")
+        for name, description, price in DEMO_MENU:
+            MenuItem.objects.get_or_create(name=name, defaults={'description': description, 'price': Decimal(price)})
+
+    def create_users(self, count, password, days):
+        """Bulk-create customers (one password hash shared by all) and their profiles"""
+        if not count:
+            return []
+        run = uuid.uuid4().hex[:6]
+        password = make_password(password)
+        joined_before = self.now - timedelta(days=days)
+        users = User.objects.bulk_create([
+            User(
+                username=f'seed_{run}_{i}',
+                email=f'seed_{run}_{i}@example.com',
+                password=password,
+                date_joined=joined_before - timedelta(minutes=self.rng.randint(0, 525_600)),
+            )
+            for i in range(count)
+        ], batch_size=5_000)
+        user_ids = [user.pk for user in users]
+        if None in user_ids:  # no RETURNING from bulk inserts
+            user_ids = list(User.objects.filter(username__startswith=f'seed_{run}_').values_list('pk', flat=True))
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=pk, role='customer') for pk in user_ids], batch_size=5_000,
+        )
+        self.stdout.write(f"Created {count:,} customers (password shared, see --password)")
+        return user_ids
+
+    def create_menu(self, count):
+        names = [f'{style} {base}' for style, base in itertools.product(DISH_STYLES, DISH_BASES)]
+        self.rng.shuffle(names)
+        items = MenuItem.objects.bulk_create([
+            MenuItem(
+                # Past every style/base pair, number the repeats
+                name=names[i % len(names)] + (f' {i // len(names) + 1}' if i >= len(names) else ''),
+                description=f'House special, {self.rng.choice(["mild", "medium", "hot"])}',
+                price=Decimal(self.rng.randrange(8_000, 60_000, 500)) / 100,
+            )
+            for i in range(count)
+        ], batch_size=5_000)
+        if count:
+            self.stdout.write(f"Created {count:,} dishes")
+        return items
+
+    def order_times(self, count, days):
+        """``count`` creation times over the last ``days`` days: busier at meal
+        times and weekends, and growing towards the present"""
+        first_day = (self.now - timedelta(days=days)).date()
+        day_starts = [
+            datetime.combine(first_day + timedelta(days=d), datetime.min.time(), tzinfo=dt_timezone.utc)
+            for d in range(days + 1)
+        ]
+        day_weights = [
+            (1 + d / days) * (WEEKEND_WEIGHT if start.weekday() >= 5 else 1)
+            for d, start in enumerate(day_starts)
+        ]
+        days_drawn = self.rng.choices(day_starts, weights=day_weights, k=count)
+        hours_drawn = self.rng.choices(range(24), weights=HOUR_WEIGHTS, k=count)
+        times = []
+        for day_start, hour in zip(days_drawn, hours_drawn):
+            created = day_start + timedelta(hours=hour, seconds=self.rng.random() * 3600)
+            if created > self.now:  # later today: move it to the same time yesterday
+                created -= timedelta(days=1)
+            times.append(created)
+        return times
+
+    def create_orders(self, count, user_ids, menu, days, batch_size):
+        # Popularity follows a long tail, for dishes and for customers alike
+        self.rng.shuffle(user_ids)
+        user_weights = zipf_cum_weights(len(user_ids), 0.5)
+        menu = list(menu)
+        self.rng.shuffle(menu)
+        menu_weights = zipf_cum_weights(len(menu), 1.1)
+
+        self.stdout.write(f"Creating {count:,} orders over {days} days...")
+        created = 0
+        with historical_timestamps():
+            while created < count:
+                size = min(batch_size, count - created)
+                with transaction.atomic():
+                    self.create_order_batch(size, user_ids, user_weights, menu, menu_weights, days)
+                created += size
+                self.stdout.write(f"  {created:,} / {count:,}", ending='\r')
+                self.stdout.flush()
+        self.stdout.write('')
+
+    def create_order_batch(self, size, user_ids, user_weights, menu, menu_weights, days):
+        rng = self.rng
+        users = rng.choices(user_ids, cum_weights=user_weights, k=size)
+        orders, lines = [], []
+        for user_id, created_at in zip(users, self.order_times(size, days)):
+            dishes = rng.choices(menu, cum_weights=menu_weights, k=rng.choices(*DISHES_PER_ORDER)[0])
+            quantities = {}
+            for dish in dishes:
+                quantities[dish] = quantities.get(dish, 0) + rng.choices(*QUANTITIES)[0]
+            is_open = self.now - created_at < OPEN_ORDER_AGE
+            orders.append(Order(
+                user_id=user_id,
+                total_amount=sum(dish.price * quantity for dish, quantity in quantities.items()),
+                created_at=created_at,
+                updated_at=created_at if is_open else created_at + timedelta(minutes=rng.randint(15, 60)),
+                status=rng.choice(Order.KITCHEN_STATUSES) if is_open else Order.SERVED,
+            ))
+            lines.append(quantities)
+
+        orders = Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(order_id=order.pk, menu_item_id=dish.pk, quantity=quantity)
+            for order, quantities in zip(orders, lines)
+            for dish, quantity in quantities.items()
+        ])
+
+        payments = []
+        for order in orders:
+            if rng.random() < NO_PAYMENT_RATE:
+                continue
+            is_open = self.now - order.created_at < OPEN_ORDER_AGE
+            unpaid = rng.random() < (0.5 if is_open else UNPAID_RATE)
+            paid_at = min(order.created_at + timedelta(seconds=rng.randint(30, 600)), self.now)
+            payments.append(Payment(
+                user_id=order.user_id,
+                order_id=order.pk,
+                amount=order.total_amount,
+                status='Pending' if unpaid else 'Completed',
+                payment_date=paid_at,
+                timestamp=order.created_at,
+                updated_at=paid_at,
+            ))
+        Payment.objects.bulk_create(payments)
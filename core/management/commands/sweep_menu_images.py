@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.menu_cache import invalidate_menu
+from core.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-check every menu image in storage, record whether it is available "
+        "and regenerate resized copies for images whose content changed"
+    )
+
+    def handle(self, *args, **options):
+        changed = []
+        for item in MenuItem.objects.only('pk', 'name', 'image', 'image_available', 'image_digest', 'image_variants'):
+            available = item.check_image_available()
+            updated = available != item.image_available
+            if updated:
+                item.image_available = available
+                state = 'available' if available else 'missing'
+                self.stdout.write(f"{item.name}: image {state}")
+            if available and item.refresh_image_variants():
+                updated = True
+                self.stdout.write(f"{item.name}: resized copies regenerated")
+            if updated:
+                changed.append(item)
+
+        if changed:
+            MenuItem.objects.bulk_update(changed, ['image_available', 'image_digest', 'image_variants'])
+            # bulk_update sends no signals, so refresh the menu cache directly
+            invalidate_menu()
+
+        self.stdout.write(self.style.SUCCESS(f"Checked menu images, {len(changed)} updated"))
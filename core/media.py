@@ -0,0 +1,160 @@
+import functools
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .images import content_digest
+
+# Resized copies carry their content hash in the name (see core.images)
+HASHED_NAME_RE = re.compile(r'-[0-9a-f]{12}-\d+w\.[a-z]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFileWrapper:
+    """File-like object that reads at most ``length`` bytes starting at ``offset``.
+
+    It deliberately has no fileno(), so WSGI servers stream it with read()
+    instead of sendfile()-ing the whole file.
+    """
+
+    def __init__(self, filelike, offset, length):
+        self.filelike = filelike
+        self.filelike.seek(offset)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.filelike.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.filelike.close()
+
+
+@functools.lru_cache(maxsize=1024)
+def stored_digest(full_path, mtime_ns, size):
+    """Content hash of a media file, as MenuItem.image_digest computes it.
+
+    Keyed by mtime and size, so a file rewritten in place is hashed again.
+    """
+    with open(full_path, 'rb') as fh:
+        return content_digest(iter(lambda: fh.read(64 * 1024), b''))
+
+
+def is_immutable(request, path, full_path, stat_result, etag):
+    """Whether the URL can never point at different bytes.
+
+    True for hashed derivative names, and for ``?v=`` only when it matches
+    the file's current content hash or ETag: a stale or made-up version
+    must not pin the current bytes in caches for a year.
+    """
+    if HASHED_NAME_RE.search(path):
+        return True
+    version = request.GET.get('v')
+    if not version:
+        return False
+    if version == etag.strip('"'):
+        return True
+    return version == stored_digest(full_path, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def cache_headers(response, immutable, etag, mtime):
+    if immutable:
+        cache_control = f'public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        cache_control = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    response.headers['Cache-Control'] = cache_control
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(mtime)
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def parse_range(header, size):
+    """Return the (start, end) byte range requested, None for the whole file, or False if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        # Multi-range and malformed headers are ignored, per RFC 9110
+        return None
+    start, end = match.groups()
+    if start == '':
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT with validators, caching headers and byte ranges"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, ValueError, OSError):
+        raise Http404("Media file not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("Media file not found")
+
+    size = stat_result.st_size
+    mtime = int(stat_result.st_mtime)
+    etag = quote_etag(f'{stat_result.st_mtime_ns:x}-{size:x}')
+    immutable = is_immutable(request, path, full_path, stat_result, etag)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if not_modified is not None:
+        return cache_headers(not_modified, immutable, etag, mtime)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_SENDFILE_HEADER:
+        # Let the front-end server stream the bytes (X-Accel-Redirect / X-Sendfile)
+        response = HttpResponse(content_type=content_type)
+        response.headers[settings.MEDIA_SENDFILE_HEADER] = settings.MEDIA_SENDFILE_PREFIX + path
+        return cache_headers(response, immutable, etag, mtime)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range in (etag, http_date(mtime))):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return cache_headers(response, immutable, etag, mtime)
+
+    if byte_range is None:
+        # Whole file: FileResponse hands the file to wsgi.file_wrapper (sendfile)
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFileWrapper(open(full_path, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.headers['Content-Length'] = str(length)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return cache_headers(response, immutable, etag, mtime)
@@ -0,0 +1,83 @@
+import threading
+from types import MappingProxyType
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import bump_namespace, get_or_compute, namespace_version
+from .models import MenuItem
+
+# Namespace in the shared cache whose version is bumped whenever a MenuItem
+# is saved or deleted, so every worker process sees the change
+MENU_NAMESPACE = 'menu'
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+class MenuSnapshot:
+    """An immutable copy of the menu as it was at one version"""
+
+    __slots__ = ('version', 'items', 'by_id')
+
+    def __init__(self, version, items):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'items', tuple(items))
+        object.__setattr__(self, 'by_id', MappingProxyType({item.id: item for item in self.items}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MenuSnapshot is immutable")
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def get_menu():
+    """Return the current menu snapshot, loading it only if the menu changed"""
+    global _snapshot
+    snapshot = _snapshot
+    version = get_menu_version()
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        # Read the version first: a change landing mid-load leaves the
+        # snapshot one version behind, so the next call reloads it.
+        version = get_menu_version()
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = MenuSnapshot(version, MenuItem.objects.order_by('id'))
+        return _snapshot
+
+
+def get_menu_version():
+    return namespace_version(MENU_NAMESPACE)
+
+
+def render_menu_grid():
+    return render_to_string('core/menu_grid.html', {'menu_items': get_menu().items})
+
+
+def get_menu_grid():
+    """The menu grid HTML, rendered once per menu version and shared between workers"""
+    return mark_safe(get_or_compute('grid', render_menu_grid, namespace=MENU_NAMESPACE))
+
+
+def invalidate_menu():
+    """Mark the cached snapshot stale in every process so the next reader reloads it"""
+    bump_namespace(MENU_NAMESPACE)
+
+
+# ---------- Signals for menu invalidation ----------
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_item_changed(sender, instance, **kwargs):
+    invalidate_menu()
+    # Bump again once the write is visible to other connections, in case a
+    # reader reloaded the snapshot before the transaction committed.
+    transaction.on_commit(invalidate_menu)
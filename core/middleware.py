@@ -0,0 +1,40 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+def sync_twin(sync_view):
+    """Mark ``sync_view`` as the version of the decorated async view that
+    WSGI requests run (see SyncViewsUnderWSGIMiddleware)"""
+    def decorator(view):
+        view.sync_view = sync_view
+        return view
+    return decorator
+
+
+class SyncViewsUnderWSGIMiddleware:
+    """Serve WSGI requests to an async view with its sync twin.
+
+    Under WSGI Django runs an async view through async_to_sync: an event
+    loop per request and a thread hop per query, which cost the async
+    pages 12-16% of their throughput under gunicorn (benchmark_asgi.py).
+    Under ASGI this middleware drops out and the async views run as they
+    are. Keep it last, so the other middleware's process_view hooks (CSRF)
+    still run.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if iscoroutinefunction(get_response) or not settings.WSGI_SYNC_VIEWS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sync_view = getattr(view_func, 'sync_view', None)
+        if sync_view is not None:
+            return sync_view(request, *view_args, **view_kwargs)
+        return None
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:20
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def mark_available_images(apps, schema_editor):
+    MenuItem = apps.get_model('core', 'MenuItem')
+    available = [
+        item.pk
+        for item in MenuItem.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image')
+        if default_storage.exists(item.image.name)
+    ]
+    MenuItem.objects.filter(pk__in=available).update(image_available=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_add_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_available',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_available_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:13
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def build_dashboard_stats(apps, schema_editor):
+    DashboardStats = apps.get_model('core', 'DashboardStats')
+    Order = apps.get_model('core', 'Order')
+    Payment = apps.get_model('core', 'Payment')
+    MenuItem = apps.get_model('core', 'MenuItem')
+    DashboardStats.objects.update_or_create(pk=1, defaults={
+        'total_orders': Order.objects.count(),
+        'completed_revenue': Payment.objects.filter(status='Completed').aggregate(total=Sum('amount'))['total'] or 0,
+        'pending_payments': Payment.objects.filter(status='Pending').count(),
+        'menu_items': MenuItem.objects.count(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_menuitem_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_orders', models.IntegerField(default=0)),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_payments', models.IntegerField(default=0)),
+                ('menu_items', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard stats',
+            },
+        ),
+        migrations.RunPython(build_dashboard_stats, migrations.RunPython.noop),
+    ]
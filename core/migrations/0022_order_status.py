@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_orders_served(apps, schema_editor):
+    # Orders placed before the kitchen lifecycle existed are already done
+    Order = apps.get_model('core', 'Order')
+    Order.objects.update(status='served')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_dashboardstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('placed', 'Placed'), ('accepted', 'Accepted'), ('cooking', 'Cooking'), ('ready', 'Ready'), ('served', 'Served')], default='placed', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_orders_served, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-17 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def dedupe_payments(apps, schema_editor):
+    """Keep one payment per order: the latest completed one, else the latest"""
+    Payment = apps.get_model('core', 'Payment')
+    duplicated = (
+        Payment.objects.values('order_id').annotate(count=Count('id')).filter(count__gt=1)
+        .values_list('order_id', flat=True)
+    )
+    for order_id in duplicated.iterator():
+        payments = Payment.objects.filter(order_id=order_id)
+        keep = (
+            payments.filter(status='Completed').order_by('-id').first()
+            or payments.order_by('-id').first()
+        )
+        payments.exclude(pk=keep.pk).delete()
+
+    # The deletes above bypass core.stats, so recount the dashboard rollup
+    DashboardStats = apps.get_model('core', 'DashboardStats')
+    DashboardStats.objects.filter(pk=1).update(
+        completed_revenue=Payment.objects.filter(status='Completed').aggregate(total=Sum('amount'))['total'] or 0,
+        pending_payments=Payment.objects.filter(status='Pending').count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_payments, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_order_user_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('order',), name='payment_one_per_order'),
+        ),
+    ]
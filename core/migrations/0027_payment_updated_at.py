@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 20:32
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_payment_date(apps, schema_editor):
+    # Completing a payment moved its payment_date, the last change tracked so far
+    Payment = apps.get_model('core', 'Payment')
+    Payment.objects.update(updated_at=models.F('payment_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_idempotencykey_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_payment_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'updated_at'], name='payment_user_updated_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.contrib.auth.models import User
 
 # Menu items available for ordering
@@ -7,9 +8,61 @@ class MenuItem(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=8, decimal_places=2)
     image = models.ImageField(upload_to='menu_images/', blank=True, null=True)
+    # Whether the image file was present in storage when last checked, so
+    # rendering the menu never has to touch the filesystem
+    image_available = models.BooleanField(default=False, editable=False)
+    # Content hash of the image and the resized copies generated from it,
+    # as {format: [[width, storage name], ...]}
+    image_digest = models.CharField(max_length=12, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.image_available = self.check_image_available()
+        stale_variants = {}
+        if not self.image or not self.image._committed:
+            # The copies belong to the previous image: serve the original until new ones exist
+            stale_variants = self.image_variants
+            self.image_digest = ''
+            self.image_variants = {}
+        needs_variants = self.image_available and not self.image_digest
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'image_available', 'image_digest', 'image_variants'}
+        super().save(*args, **kwargs)
+
+        if needs_variants or stale_variants:
+            # Encoding takes seconds: never inside the saving transaction
+            from .images import generate_variants_on_commit
+            generate_variants_on_commit(self.pk, stale_variants, generate=needs_variants)
+
+    def refresh_image_variants(self):
+        """Regenerate the resized copies if the image content changed; return whether it did"""
+        from .images import delete_derivatives, file_digest, generate_derivatives
+
+        digest = file_digest(self.image)
+        if digest == self.image_digest:
+            return False
+        previous = self.image_variants
+        self.image_variants = generate_derivatives(self.image, digest)
+        self.image_digest = digest
+        delete_derivatives(self.image.storage, previous, keep=self.image_variants)
+        return True
+
+    def check_image_available(self):
+        """Check storage for the image file (filesystem I/O; not for render paths)"""
+        if not self.image:
+            return False
+        if not self.image._committed:
+            # A fresh upload is written to storage as part of this save
+            return True
+        try:
+            return self.image.storage.exists(self.image.name)
+        except (OSError, ValueError):
+            return False
     
     @property
     def image_url(self):
@@ -22,20 +75,42 @@ class MenuItem(models.Model):
     
     def get_image_url(self):
         """Get the image URL with fallback handling"""
-        if self.image and hasattr(self.image, 'url'):
-            try:
-                # Check if image file exists
-                import os
-                from django.conf import settings
-                image_path = os.path.join(settings.MEDIA_ROOT, str(self.image))
-                if os.path.exists(image_path):
-                    return self.image.url
-            except:
-                pass
-        
+        if self.image and self.image_available:
+            # Prefer the largest JPEG copy: every browser can decode it,
+            # unlike an original uploaded as WebP or AVIF
+            jpeg_variants = self.image_variants.get('jpeg')
+            if jpeg_variants:
+                return self.image.storage.url(jpeg_variants[-1][1])
+            # The content hash makes the URL immutable, so it can be cached forever
+            if self.image_digest:
+                return f"{self.image.url}?v={self.image_digest}"
+            return self.image.url
+
         # Return fallback
         return self.get_fallback_image_url()
     
+    def get_image_srcset(self, image_format='jpeg'):
+        """Get a srcset value listing the resized copies, or '' when there are none"""
+        if not self.image_available:
+            return ''
+        storage = self.image.storage
+        return ', '.join(
+            f"{storage.url(name)} {width}w"
+            for width, name in self.image_variants.get(image_format, [])
+        )
+
+    def get_image_sources(self):
+        """Get the modern-format copies as <source> type/srcset pairs, best format first"""
+        from .images import MIME_TYPES
+
+        if not self.image_available:
+            return []
+        return [
+            {'type': MIME_TYPES[image_format], 'srcset': self.get_image_srcset(image_format)}
+            for image_format in self.image_variants
+            if image_format != 'jpeg' and image_format in MIME_TYPES
+        ]
+
     def get_fallback_image_url(self):
         """Get a simple fallback image when no image is available"""
         return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjBmMGYwIi8+PHRleHQgeD0iMTUwIiB5PSIxMDAiIHRleHQtYW5jaG9yPSJtaWRkbGUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSIxNiIgZmlsbD0iIzY2NiI+SW5kaWFuIERpc2g8L3RleHQ+PC9zdmc+"
@@ -67,12 +142,71 @@ class MenuItem(models.Model):
         """Get appropriate alt text for the image"""
         return f"Delicious {self.name} - {self.description[:50]}..." if self.description else f"Delicious {self.name}"
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """Load each order's user and line items (with their menu items) up front"""
+        return self.select_related('user').prefetch_related(
+            Prefetch('orderitem_set', queryset=OrderItem.objects.select_related('menu_item'))
+        )
+
+    def with_payments(self):
+        """Load each order's payments up front, oldest first, so payment_set.first needs no query"""
+        return self.prefetch_related(Prefetch('payment_set', queryset=Payment.objects.order_by('id')))
+
+    def with_payment_status(self):
+        """Annotate each order with the status of its latest payment"""
+        latest_payment = Payment.objects.filter(order=OuterRef('pk')).order_by('-id')
+        return self.annotate(latest_payment_status=Subquery(latest_payment.values('status')[:1]))
+
+    def kitchen_queue(self, status):
+        """Orders waiting in one kitchen status, oldest first.
+
+        Filtering on a single status lets the planner walk
+        order_status_created_idx in order; with ``status__in`` SQLite
+        prefers scanning order_created_idx past every served order.
+        """
+        return self.filter(status=status).order_by('created_at', 'id')
+
+
 # Each order placed by a user
 class Order(models.Model):
+    # Kitchen lifecycle, in order: each status can only move to the next one
+    PLACED = 'placed'
+    ACCEPTED = 'accepted'
+    COOKING = 'cooking'
+    READY = 'ready'
+    SERVED = 'served'
+    STATUS_CHOICES = [
+        (PLACED, 'Placed'),
+        (ACCEPTED, 'Accepted'),
+        (COOKING, 'Cooking'),
+        (READY, 'Ready'),
+        (SERVED, 'Served'),
+    ]
+    NEXT_STATUS = {PLACED: ACCEPTED, ACCEPTED: COOKING, COOKING: READY, READY: SERVED}
+    KITCHEN_STATUSES = [PLACED, ACCEPTED, COOKING, READY]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     items = models.ManyToManyField(MenuItem, through='OrderItem')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0) 
     created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PLACED)
+    # Set on every change, including queryset updates (see services.advance_order)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Per-user history, newest first (order_list)
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+            # Global recency (admin dashboard, admin date filter)
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            # Kitchen queue: oldest tickets in one status (kitchen_queue)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Per-user last change, for order history validators (core.conditional)
+            models.Index(fields=['user', 'updated_at'], name='order_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
@@ -81,6 +215,13 @@ class Order(models.Model):
     def total_price(self):
         return self.total_amount
 
+    @property
+    def next_status(self):
+        return self.NEXT_STATUS.get(self.status)
+
+    def get_next_status_display(self):
+        return dict(self.STATUS_CHOICES).get(self.next_status, '')
+
 # Intermediate table for item-quantity relationship in an order
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
@@ -99,9 +240,35 @@ class Payment(models.Model):
     payment_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, default='Pending')  # Add this if missing
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Last change of any kind (status included); queryset updates must set it too
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Per-user history, newest first (payment_list, make_payment)
+            models.Index(fields=['user', 'payment_date'], name='payment_user_date_idx'),
+            # Conditional GET validators for the history pages (core.conditional)
+            models.Index(fields=['user', 'updated_at'], name='payment_user_updated_idx'),
+            # Status counts and revenue totals (admin dashboard); covers amount
+            models.Index(fields=['status', 'amount'], name='payment_status_amount_idx'),
+            # Admin date filter and ordering
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ]
+        constraints = [
+            # One payment per order; also the index for payment lookups by order (make_payment)
+            models.UniqueConstraint(fields=['order'], name='payment_one_per_order'),
+        ]
+
     def __str__(self):
         return f'Payment {self.id} - {self.user.username}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status/amount so saves only apply the difference to DashboardStats
+        instance._loaded_stats = (instance.__dict__.get('status'), instance.__dict__.get('amount'))
+        return instance
+
 # User role (customer/staff/admin)
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -115,3 +282,40 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+# Running totals for the admin dashboard, maintained incrementally by core.stats
+class DashboardStats(models.Model):
+    total_orders = models.IntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_payments = models.IntegerField(default=0)
+    menu_items = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+
+    def __str__(self):
+        return f"{self.total_orders} orders, ₹{self.completed_revenue} revenue"
+
+
+# Result of a checkout POST, so a retried request with the same key replays it
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    scope = models.CharField(max_length=30)  # which endpoint the key was used on
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64, blank=True, default='')  # hash of the request's content
+    result_url = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Also the index behind the replay lookup
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='idempotency_user_scope_key_uniq'),
+        ]
+        indexes = [
+            # Pruning old keys (prune_idempotency_keys)
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} -> {self.result_url}"
@@ -0,0 +1,80 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+ORDERS_PAGE_SIZE = 20
+PAYMENTS_PAGE_SIZE = 25
+KITCHEN_QUEUE_SIZE = 20  # tickets per kitchen status column
+
+
+class KeysetPage:
+    """One page of rows plus the cursor pointing just past its last row"""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(value, pk):
+    """Pack a (timestamp, id) position into an opaque, URL-safe token"""
+    raw = f"{value.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Unpack a token from encode_cursor, returning None if it is missing or invalid"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+def keyset_queryset(queryset, field, cursor=None, page_size=ORDERS_PAGE_SIZE):
+    """The query for one page plus a single look-ahead row"""
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+        )
+    return queryset[:page_size + 1]
+
+
+def make_page(rows, field, page_size):
+    if len(rows) <= page_size:
+        return KeysetPage(rows)
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return KeysetPage(rows, encode_cursor(getattr(last, field), last.pk))
+
+
+def keyset_paginate(queryset, field, cursor=None, page_size=ORDERS_PAGE_SIZE):
+    """Return the rows after ``cursor``, newest first, ordered by (``field``, id).
+
+    Each page is a bounded, index-friendly range scan, so its cost does not
+    depend on how far back the user has paged.
+    """
+    rows = list(keyset_queryset(queryset, field, cursor, page_size))
+    return make_page(rows, field, page_size)
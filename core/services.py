@@ -0,0 +1,161 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .events import order_event, payment_event, publish_on_commit
+from .models import IdempotencyKey, Order, OrderItem, Payment
+from .stats import apply_stats_delta
+
+
+class EmptyOrderError(Exception):
+    """Raised when an order is submitted without any items."""
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when an idempotency key comes back with a different request."""
+
+
+# Longest client-supplied idempotency key we accept
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+# ---------- Idempotency ----------
+def find_idempotent_result(user, scope, key, fingerprint=''):
+    """The result URL recorded for ``key``, or None (one unique-index lookup).
+
+    Raises IdempotencyKeyReusedError if the key was first used for a request
+    with a different ``fingerprint``: that is a new request, not a retry.
+    """
+    if not key:
+        return None
+    recorded = (
+        IdempotencyKey.objects.filter(user=user, scope=scope, key=key)
+        .values_list('result_url', 'fingerprint')
+        .first()
+    )
+    if recorded is None:
+        return None
+    result_url, recorded_fingerprint = recorded
+    if recorded_fingerprint != fingerprint:
+        raise IdempotencyKeyReusedError("This idempotency key was already used for a different request.")
+    return result_url
+
+
+def run_idempotent(user, scope, key, action, fingerprint=''):
+    """Run ``action`` once per (user, scope, key) and return its result URL.
+
+    Callers check find_idempotent_result() first, before doing any other
+    work. ``action`` performs the writes and returns the URL to send the
+    client to. It runs in the same transaction as the key insert, so if a
+    request with the same key commits in between, the unique constraint
+    rolls this one back and the original result is returned instead.
+    ``fingerprint`` identifies the request's content (see
+    find_idempotent_result). Requests without a key (or with an oversized
+    one) just run ``action``.
+    """
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return action()
+    try:
+        with transaction.atomic():
+            result_url = action()
+            IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, fingerprint=fingerprint, result_url=result_url,
+            )
+    except IntegrityError:
+        replay = find_idempotent_result(user, scope, key, fingerprint)
+        if replay is None:
+            raise
+        return replay
+    return result_url
+
+
+# ---------- Order Placement ----------
+def create_order(user, quantities, menu_items):
+    """Place an order for ``user`` in a fixed number of queries.
+
+    ``quantities`` maps menu item ids to the requested quantity and
+    ``menu_items`` maps menu item ids to the ``MenuItem`` rows they were
+    priced from, so no menu lookups happen inside the transaction.
+    """
+    lines = []
+    total = Decimal('0')
+    for item_id, quantity in quantities.items():
+        if not quantity or quantity < 0:
+            continue
+        item = menu_items.get(item_id)
+        if item is None:
+            raise ValueError(f"Unknown menu item: {item_id}")
+        lines.append((item, quantity))
+        total += item.price * quantity
+
+    if not lines:
+        raise EmptyOrderError("Please select at least one item to order.")
+
+    with transaction.atomic():
+        order = Order.objects.create(user=user, total_amount=total)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=item, quantity=quantity)
+            for item, quantity in lines
+        ])
+        Payment.objects.create(user=user, order=order, amount=total, status='Pending')
+
+    return order
+
+
+# ---------- Payment ----------
+def complete_payment(user, order):
+    """Move the order's payment from Pending to Completed, exactly once.
+
+    The transition is a single ``UPDATE ... WHERE status = 'Pending'`` that
+    only writes the changed columns, so of several concurrent submits one
+    matches the row and the others update nothing. A missing payment is
+    created; the one-payment-per-order constraint stops two racing
+    requests from both doing so. Returns ``(payment, changed)``.
+    """
+    amount = Decimal(order.total_amount)
+    now = timezone.now()
+    with transaction.atomic():
+        updated = bool(
+            Payment.objects.filter(order=order, user=user, status='Pending')
+            .update(status='Completed', amount=amount, payment_date=now, updated_at=now)
+        )
+        changed = updated
+        if updated:
+            # update() sends no post_save: a Pending payment counted no revenue
+            apply_stats_delta(pending_payments=-1, completed_revenue=amount)
+        elif not Payment.objects.filter(order=order).exists():
+            try:
+                with transaction.atomic():
+                    # Create new if missing (for safety); post_save publishes its event
+                    Payment.objects.create(user=user, order=order, amount=amount, status='Completed')
+                changed = True
+            except IntegrityError:
+                pass  # a concurrent request created it first
+        payment = Payment.objects.get(order=order, user=user)
+        if updated:
+            publish_on_commit(user.pk, payment_event(payment))
+    return payment, changed
+
+
+# ---------- Kitchen ----------
+def advance_order(order_id, current_status):
+    """Move an order from ``current_status`` to the next lifecycle status.
+
+    The update only matches while the order is still in ``current_status``,
+    so two kitchen screens pressing the same button advance it once.
+    Returns the new status, or None if the order had already moved on.
+    """
+    next_status = Order.NEXT_STATUS.get(current_status)
+    if next_status is None:
+        return None
+    updated = (
+        Order.objects.filter(pk=order_id, status=current_status)
+        .update(status=next_status, updated_at=timezone.now())
+    )
+    if not updated:
+        return None
+    # update() sends no post_save, so tell the customer's live stream directly
+    order = Order.objects.only('pk', 'user_id', 'status').get(pk=order_id)
+    publish_on_commit(order.user_id, order_event(order))
+    return next_status
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DashboardStats, MenuItem, Order, Payment
+
+STATS_ID = 1
+
+
+def compute_dashboard_stats():
+    """Aggregate the dashboard totals from scratch (full table scans)"""
+    return {
+        'total_orders': Order.objects.count(),
+        'completed_revenue': Payment.objects.filter(status='Completed').aggregate(total=Sum('amount'))['total'] or 0,
+        'pending_payments': Payment.objects.filter(status='Pending').count(),
+        'menu_items': MenuItem.objects.count(),
+    }
+
+
+def rebuild_dashboard_stats():
+    """Recompute the rollup row; use after bulk writes that bypass signals"""
+    stats, _ = DashboardStats.objects.update_or_create(pk=STATS_ID, defaults=compute_dashboard_stats())
+    return stats
+
+
+def get_dashboard_stats():
+    """Read the rollup row in one query, building it on first use"""
+    return DashboardStats.objects.filter(pk=STATS_ID).first() or rebuild_dashboard_stats()
+
+
+def apply_stats_delta(**deltas):
+    """Add ``deltas`` to the rollup row in a single UPDATE"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = DashboardStats.objects.filter(pk=STATS_ID).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        # No row yet: build it from the tables, which already include this write
+        rebuild_dashboard_stats()
+
+
+def payment_contribution(status, amount):
+    """What one payment adds to the rollup, as (pending count, completed revenue)"""
+    if status == 'Pending':
+        return 1, Decimal('0')
+    if status == 'Completed':
+        return 0, Decimal(amount or 0)
+    return 0, Decimal('0')
+
+
+def record_payment_change(old, new):
+    """Apply the difference between two (status, amount) states of one payment"""
+    old_pending, old_revenue = payment_contribution(*old) if old else (0, Decimal('0'))
+    new_pending, new_revenue = payment_contribution(*new) if new else (0, Decimal('0'))
+    apply_stats_delta(
+        pending_payments=new_pending - old_pending,
+        completed_revenue=new_revenue - old_revenue,
+    )
+
+
+# ---------- Signals for stats maintenance ----------
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(total_orders=1)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    apply_stats_delta(total_orders=-1)
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(menu_items=1)
+
+
+@receiver(post_delete, sender=MenuItem)
+def menu_item_deleted(sender, instance, **kwargs):
+    apply_stats_delta(menu_items=-1)
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, '_loaded_stats', None)
+    if not created and old is None:
+        # Saved without having been loaded (e.g. a hand-built instance): reconcile fully
+        rebuild_dashboard_stats()
+    else:
+        record_payment_change(old, (instance.status, instance.amount))
+    instance._loaded_stats = (instance.status, instance.amount)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_stats', None) or (instance.status, instance.amount)
+    record_payment_change(old, None)
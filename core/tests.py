@@ -1,3 +1,1365 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import threading
+import shutil
+import tempfile
+import time
+import zlib
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from PIL import Image
+
+from KITCHARY_final.settings import BASE_DIR, database_settings
+
+from . import cache, views
+from .db import pragma_statements
+from .events import broker, event_stream
+from .images import MIME_TYPES, content_digest, encode_within_budget
+from .menu_cache import get_menu, invalidate_menu
+from .models import IdempotencyKey, MenuItem, Order, OrderItem, Payment
+from .pagination import decode_cursor, keyset_paginate
+from .services import EmptyOrderError, advance_order, complete_payment, create_order, run_idempotent
+from .stats import compute_dashboard_stats, get_dashboard_stats, rebuild_dashboard_stats
+
+
+# A 1x1 transparent GIF, small enough to inline as an upload
+TINY_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00'
+    b'\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='kitchary-test-media-')
+# Tests clear the shared cache: keep it away from a dev server's
+TEST_CACHE_DIR = tempfile.mkdtemp(prefix='kitchary-test-cache-')
+test_caches = override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEST_CACHE_DIR},
+})
+
+
+def setUpModule():
+    test_caches.enable()
+
+
+def tearDownModule():
+    test_caches.disable()
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+    shutil.rmtree(TEST_CACHE_DIR, ignore_errors=True)
+
+
+class KitcharyTestCase(TestCase):
+    """TestCase that starts every test with empty caches"""
+
+    def setUp(self):
+        super().setUp()
+        # Rolled-back rows fire no signals, so drop whatever the last test cached
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        invalidate_menu()
+
+
+def make_menu(count):
+    return [
+        MenuItem.objects.create(name=f'Dish {i}', price=Decimal('10.50') + i)
+        for i in range(count)
+    ]
+
+
+# ---------- Order Placement ----------
+class CreateOrderTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        self.menu = {item.id: item for item in make_menu(12)}
+
+    def test_creates_order_items_and_pending_payment(self):
+        first, second = list(self.menu)[:2]
+        order = create_order(self.user, {first: 2, second: 1}, self.menu)
+
+        expected = self.menu[first].price * 2 + self.menu[second].price
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, expected)
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 2)
+        payment = Payment.objects.get(order=order)
+        self.assertEqual(payment.amount, expected)
+        self.assertEqual(payment.status, 'Pending')
+
+    def test_query_count_does_not_depend_on_line_items(self):
+        ids = list(self.menu)
+        # order, items, payment, plus one rollup UPDATE each for the order and payment
+        with self.assertNumQueries(7):
+            create_order(self.user, {ids[0]: 1}, self.menu)
+        with self.assertNumQueries(7):
+            create_order(self.user, {item_id: 3 for item_id in ids}, self.menu)
+
+    def test_empty_order_is_rejected_without_writes(self):
+        with self.assertNumQueries(0):
+            with self.assertRaises(EmptyOrderError):
+                create_order(self.user, {item_id: 0 for item_id in self.menu}, self.menu)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unknown_item_is_rejected(self):
+        with self.assertRaises(ValueError):
+            create_order(self.user, {-1: 1}, self.menu)
+        self.assertFalse(Order.objects.exists())
+
+    def test_place_order_view_redirects_to_payment(self):
+        self.client.force_login(self.user)
+        item_id = next(iter(self.menu))
+        response = self.client.post(reverse('place_order'), {f'item_{item_id}': 2})
+
+        order = Order.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('payment', args=[order.id]), fetch_redirect_response=False)
+        self.assertEqual(order.total_amount, self.menu[item_id].price * 2)
+
+
+# ---------- Idempotent Checkout ----------
+class IdempotentCheckoutTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='judy', password='secret123')
+        self.item = make_menu(1)[0]
+        self.client.force_login(self.user)
+
+    def place(self, key):
+        return self.client.post(reverse('place_order'), {f'item_{self.item.id}': 1, 'idempotency_key': key})
+
+    def test_replayed_order_returns_the_first_result(self):
+        first = self.place('k1')
+        with self.assertNumQueries(3):  # session, user, idempotency key lookup
+            second = self.place('k1')
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_new_key_places_a_new_order(self):
+        self.place('k1')
+        self.place('k2')
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_keys_are_per_user(self):
+        self.place('shared')
+        other = User.objects.create_user(username='kim', password='secret123')
+        self.client.force_login(other)
+        self.place('shared')
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_replayed_payment_does_not_rerun_the_update(self):
+        order = create_order(self.user, {self.item.id: 1}, {self.item.id: self.item})
+        url = reverse('payment', args=[order.id])
+        first = self.client.post(url, {'idempotency_key': 'pay-1'})
+        paid_at = Payment.objects.get(order=order).payment_date
+        second = self.client.post(url, {'idempotency_key': 'pay-1'})
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(Payment.objects.get(order=order).payment_date, paid_at)
+        self.assertEqual(IdempotencyKey.objects.filter(scope=f'make_payment:{order.id}').count(), 1)
+
+    def test_payment_key_reused_for_another_order_pays_that_order(self):
+        menu = {self.item.id: self.item}
+        first, second = (create_order(self.user, {self.item.id: 1}, menu) for _ in range(2))
+        self.client.post(reverse('payment', args=[first.id]), {'idempotency_key': 'pay-1'})
+        response = self.client.post(reverse('payment', args=[second.id]), {'idempotency_key': 'pay-1'})
+        payment = Payment.objects.get(order=second)
+        self.assertEqual(response['Location'], reverse('payment_success', args=[payment.id]))
+        self.assertEqual(payment.status, 'Completed')
+
+    def test_order_key_reused_for_a_different_cart_is_rejected(self):
+        self.place('k1')
+        response = self.client.post(reverse('place_order'), {f'item_{self.item.id}': 3, 'idempotency_key': 'k1'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_losing_a_race_rolls_back_and_replays(self):
+        # Another request with the same key committed after our lookup
+        IdempotencyKey.objects.create(user=self.user, scope='place_order', key='race', result_url='/first/')
+        menu = {self.item.id: self.item}
+        result = run_idempotent(
+            self.user, 'place_order', 'race',
+            lambda: reverse('payment', args=[create_order(self.user, {self.item.id: 1}, menu).id]),
+        )
+        self.assertEqual(result, '/first/')
+        self.assertFalse(Order.objects.exists())
+
+    def test_requests_without_a_key_still_work(self):
+        self.client.post(reverse('place_order'), {f'item_{self.item.id}': 1})
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+# ---------- Payment Completion ----------
+class CompletePaymentTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='lena', password='secret123')
+        self.menu = {item.id: item for item in make_menu(2)}
+        self.order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+
+    def test_only_the_first_completion_changes_anything(self):
+        payment, changed = complete_payment(self.user, self.order)
+        self.assertTrue(changed)
+        self.assertEqual(payment.status, 'Completed')
+        payment, changed = complete_payment(self.user, self.order)
+        self.assertFalse(changed)
+        stats = get_dashboard_stats()
+        self.assertEqual((stats.pending_payments, stats.completed_revenue), (0, self.order.total_amount))
+
+    def test_missing_payment_is_created_completed(self):
+        Payment.objects.filter(order=self.order).delete()
+        payment, changed = complete_payment(self.user, self.order)
+        self.assertTrue(changed)
+        self.assertEqual(Payment.objects.get(order=self.order).status, 'Completed')
+
+    def test_one_payment_per_order(self):
+        with self.assertRaises(IntegrityError):
+            Payment.objects.create(user=self.user, order=self.order, amount=1)
+
+
+class ConcurrentPaymentTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        invalidate_menu()
+        rebuild_dashboard_stats()
+        self.user = User.objects.create_user(username='mona', password='secret123')
+        self.menu = {item.id: item for item in make_menu(2)}
+
+    def race(self, target):
+        barrier = threading.Barrier(self.THREADS)
+        results, errors = [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(target())
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_exactly_one_concurrent_completion_wins(self):
+        order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        results = self.race(lambda: complete_payment(self.user, order)[1])
+        self.assertEqual(sorted(results), [False] * (self.THREADS - 1) + [True])
+        self.assertEqual(Payment.objects.filter(order=order, status='Completed').count(), 1)
+        self.assertEqual(get_dashboard_stats().completed_revenue, order.total_amount)
+
+    def test_concurrent_creation_makes_one_payment(self):
+        order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        Payment.objects.filter(order=order).delete()
+        results = self.race(lambda: complete_payment(self.user, order)[1])
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Payment.objects.filter(order=order).count(), 1)
+
+
+# ---------- Order History ----------
+class OrderListQueryTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='bob', password='secret123')
+        self.menu = {item.id: item for item in make_menu(3)}
+        self.client.force_login(self.user)
+
+    def place_orders(self, count):
+        for _ in range(count):
+            create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('order_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant_as_orders_grow(self):
+        self.place_orders(2)
+        few = self.count_queries()
+        self.place_orders(20)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_shows_latest_payment_status(self):
+        self.place_orders(1)
+        Payment.objects.filter(user=self.user).update(status='Completed')
+        response = self.client.get(reverse('order_list'))
+        self.assertContains(response, 'Paid')
+        self.assertNotContains(response, 'Payment Pending')
+
+
+# ---------- Keyset Pagination ----------
+class KeysetPaginationTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='carol', password='secret123')
+        self.menu = {item.id: item for item in make_menu(1)}
+        for _ in range(7):
+            create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        # Force timestamp ties so the id tie-breaker is exercised
+        Order.objects.filter(user=self.user).update(created_at=timezone.now())
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            page = keyset_paginate(Order.objects.filter(user=self.user), 'created_at', cursor, page_size=3)
+            seen.extend(order.id for order in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        expected = list(Order.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_starts_from_the_top(self):
+        page = keyset_paginate(Order.objects.filter(user=self.user), 'created_at', 'not-a-cursor', page_size=3)
+        self.assertEqual(len(page), 3)
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+
+    def test_order_list_renders_single_page_without_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('order_list'))
+        self.assertEqual(len(response.context['orders']), 7)
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_make_payment_fetches_only_recent_history(self):
+        self.client.force_login(self.user)
+        order = Order.objects.filter(user=self.user).first()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('payment', args=[order.id]))
+        self.assertEqual(len(response.context['payment_history']), 5)
+        history_sql = [q['sql'] for q in ctx.captured_queries if 'ORDER BY "core_payment"."payment_date" DESC' in q['sql']]
+        self.assertEqual(len(history_sql), 1)
+        self.assertIn('LIMIT 5', history_sql[0])
+
+
+# ---------- Menu Snapshot Cache ----------
+class CacheTests(KitcharyTestCase):
+    def test_value_is_computed_once_and_kept_in_both_tiers(self):
+        compute = mock.Mock(return_value=42)
+        self.assertEqual(cache.get_or_compute('answer', compute), 42)
+        self.assertEqual(cache.get_or_compute('answer', compute), 42)
+        compute.assert_called_once()
+        self.assertEqual(cache.shared_cache().get('answer'), 42)
+
+    def test_shared_hit_fills_local_tier(self):
+        cache.shared_cache().set('answer', 42)
+        compute = mock.Mock()
+        self.assertEqual(cache.get_or_compute('answer', compute), 42)
+        compute.assert_not_called()
+        self.assertEqual(cache.local_cache().get('answer'), 42)
+
+    def test_expired_value_is_recomputed(self):
+        compute = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(cache.get_or_compute('short', compute, ttl=1), 1)
+        # Age both tiers past the TTL instead of sleeping
+        with mock.patch('time.time', return_value=timezone.now().timestamp() + 5):
+            self.assertEqual(cache.get_or_compute('short', compute, ttl=1), 2)
+
+    def test_bump_namespace_invalidates_its_keys(self):
+        compute = mock.Mock(side_effect=['old', 'new'])
+        cache.get_or_compute('page', compute, namespace='menu')
+        cache.bump_namespace('menu')
+        self.assertEqual(cache.get_or_compute('page', compute, namespace='menu'), 'new')
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            barrier.abort()  # let the waiting threads through
+            return 'value'
+
+        def worker(results):
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            results.append(cache.get_or_compute('hot', compute))
+
+        results = []
+        threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_waits_for_the_process_holding_the_lock(self):
+        lock_path = cache._lock_path('answer')
+        open(lock_path, 'x').close()  # another process is computing
+        threading.Timer(0.2, cache.shared_cache().set, args=('answer', 42)).start()
+        compute = mock.Mock()
+        self.assertEqual(cache.get_or_compute('answer', compute), 42)
+        compute.assert_not_called()
+        os.remove(lock_path)
+
+    def test_waiting_for_another_process_does_not_block_other_keys(self):
+        stripe = zlib.crc32(b'answer') % len(cache._LOCKS)
+        neighbour = next(
+            f'key{n}' for n in range(10000) if zlib.crc32(f'key{n}'.encode()) % len(cache._LOCKS) == stripe
+        )
+        lock_path = cache._lock_path('answer')
+        open(lock_path, 'x').close()  # another process is computing 'answer'
+        waiter = threading.Thread(target=cache.get_or_compute, args=('answer', mock.Mock()))
+        waiter.start()
+        try:
+            time.sleep(0.1)  # let the waiter start polling
+            started = time.monotonic()
+            self.assertEqual(cache.get_or_compute(neighbour, lambda: 'other'), 'other')
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            cache.shared_cache().set('answer', 42)
+            waiter.join()
+            os.remove(lock_path)
+
+    def test_lock_left_by_a_dead_process_is_taken_over(self):
+        lock_path = cache._lock_path('answer')
+        open(lock_path, 'x').close()
+        old = time.time() - cache.LOCK_TTL - 1
+        os.utime(lock_path, (old, old))
+        self.assertEqual(cache.get_or_compute('answer', lambda: 42), 42)
+        self.assertFalse(os.path.exists(lock_path))
+
+    def test_menu_version_lives_in_shared_tier(self):
+        make_menu(2)
+        snapshot = get_menu()
+        # Another worker process changing the menu only touches the shared tier
+        cache.bump_namespace('menu')
+        with self.assertNumQueries(1):
+            self.assertIsNot(get_menu(), snapshot)
+
+
+class MenuCacheTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='dave', password='secret123')
+        make_menu(4)
+
+    def test_snapshot_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            first = get_menu()
+        with self.assertNumQueries(0):
+            self.assertIs(get_menu(), first)
+        self.assertEqual(len(first), 4)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = get_menu()
+        with self.assertRaises(AttributeError):
+            snapshot.items = ()
+        with self.assertRaises(TypeError):
+            snapshot.by_id[0] = None
+
+    def test_save_and_delete_invalidate_snapshot(self):
+        snapshot = get_menu()
+        MenuItem.objects.create(name='Extra Dish', price=Decimal('5.00'))
+        self.assertEqual(len(get_menu()), 5)
+        self.assertGreater(get_menu().version, snapshot.version)
+
+        get_menu().items[0].delete()
+        self.assertEqual(len(get_menu()), 4)
+
+    def test_menu_and_place_order_pages_skip_menu_queries_when_warm(self):
+        self.client.force_login(self.user)
+        get_menu()
+        for url in (reverse('menu'), reverse('place_order')):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any('core_menuitem' in q['sql'] for q in ctx.captured_queries), url)
+
+    def test_menu_grid_is_rendered_once_per_version(self):
+        response = self.client.get(reverse('menu'))
+        self.assertTemplateUsed(response, 'core/menu_grid.html')
+        response = self.client.get(reverse('menu'))
+        self.assertTemplateNotUsed(response, 'core/menu_grid.html')
+        self.assertContains(response, 'class="menu-card"', count=4)
+
+    def test_menu_change_rerenders_grid(self):
+        self.client.get(reverse('menu'))
+        item = MenuItem.objects.create(name='Mango Lassi', price=Decimal('3.00'))
+        self.assertContains(self.client.get(reverse('menu')), 'Mango Lassi')
+        item.delete()
+        self.assertNotContains(self.client.get(reverse('menu')), 'Mango Lassi')
+
+
+# ---------- Menu Images ----------
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, MENU_IMAGE_VARIANTS_IN_BACKGROUND=False)
+class MenuImageAvailabilityTests(KitcharyTestCase):
+    def make_item(self):
+        upload = SimpleUploadedFile('dish.gif', TINY_GIF, content_type='image/gif')
+        with self.captureOnCommitCallbacks(execute=True):
+            item = MenuItem.objects.create(name='Pictured Dish', price=Decimal('9.00'), image=upload)
+        item.refresh_from_db()
+        return item
+
+    def test_upload_marks_image_available(self):
+        item = self.make_item()
+        self.assertTrue(item.image_available)
+        self.assertEqual(item.get_image_url(), f'{item.image.url}?v={item.image_digest}')
+        self.assertFalse(MenuItem.objects.create(name='Plain', price=1).image_available)
+
+    def test_image_url_does_no_filesystem_io(self):
+        item = MenuItem.objects.get(pk=self.make_item().pk)
+        with mock.patch('os.stat', side_effect=AssertionError('stat during render')), \
+                mock.patch('os.path.exists', side_effect=AssertionError('stat during render')):
+            self.assertTrue(item.get_image_url().startswith(item.image.url))
+
+    def test_sweep_marks_missing_images(self):
+        item = self.make_item()
+        item.image.storage.delete(item.image.name)
+        get_menu()
+
+        call_command('sweep_menu_images', stdout=io.StringIO())
+
+        item.refresh_from_db()
+        self.assertFalse(item.image_available)
+        self.assertEqual(item.get_image_url(), item.get_fallback_image_url())
+        self.assertFalse(get_menu().by_id[item.pk].image_available)
+
+
+def make_jpeg(width=1200, height=900, color=(200, 120, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, MENU_IMAGE_VARIANTS_IN_BACKGROUND=False)
+class MenuImageVariantTests(KitcharyTestCase):
+    def make_item(self, **kwargs):
+        upload = SimpleUploadedFile('dish.jpg', make_jpeg(**kwargs), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            item = MenuItem.objects.create(name='Pictured Dish', price=Decimal('9.00'), image=upload)
+        item.refresh_from_db()
+        return item
+
+    def test_save_serves_the_original_and_encodes_after_commit(self):
+        upload = SimpleUploadedFile('dish.jpg', make_jpeg(), content_type='image/jpeg')
+        with mock.patch('core.images.generate_derivatives') as generate:
+            with self.captureOnCommitCallbacks() as callbacks:
+                item = MenuItem.objects.create(name='Pictured Dish', price=Decimal('9.00'), image=upload)
+            generate.assert_not_called()
+        self.assertEqual(item.image_variants, {})
+        self.assertEqual(item.get_image_url(), item.image.url)
+
+        for callback in callbacks:
+            callback()
+        item.refresh_from_db()
+        self.assertTrue(item.get_image_url().endswith('-960w.jpg'))
+
+    def test_replacing_the_image_deletes_the_old_copies(self):
+        item = self.make_item()
+        old_names = [name for _, name in item.image_variants['jpeg']]
+        item.image = SimpleUploadedFile('other.jpg', make_jpeg(color=(10, 200, 10)), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        item.refresh_from_db()
+        self.assertIn('other', item.get_image_url())
+        self.assertFalse(any(item.image.storage.exists(name) for name in old_names))
+
+    def test_upload_generates_hashed_resized_copies(self):
+        item = self.make_item()
+        widths = [width for width, _ in item.image_variants['jpeg']]
+        self.assertEqual(widths, [160, 320, 640, 960])
+        for width, name in item.image_variants['jpeg']:
+            self.assertIn(item.image_digest, name)
+            with item.image.storage.open(name) as stored:
+                self.assertEqual(Image.open(stored).width, width)
+        self.assertIn('960w', item.get_image_srcset())
+
+    def test_widths_never_exceed_the_source(self):
+        item = self.make_item(width=500, height=400)
+        self.assertEqual([width for width, _ in item.image_variants['jpeg']], [160, 320])
+
+    def test_unchanged_source_is_not_reprocessed(self):
+        item = self.make_item()
+        with mock.patch('core.images.generate_derivatives') as generate:
+            item.price = Decimal('11.00')
+            item.save()
+            call_command('sweep_menu_images', stdout=io.StringIO())
+        generate.assert_not_called()
+
+    def test_sweep_regenerates_when_source_changes(self):
+        item = self.make_item()
+        old_names = [name for _, name in item.image_variants['jpeg']]
+        storage = item.image.storage
+        storage.delete(item.image.name)
+        storage.save(item.image.name, io.BytesIO(make_jpeg(color=(10, 200, 10))))
+
+        call_command('sweep_menu_images', stdout=io.StringIO())
+
+        item.refresh_from_db()
+        new_names = [name for _, name in item.image_variants['jpeg']]
+        self.assertNotEqual(new_names, old_names)
+        self.assertTrue(all(storage.exists(name) for name in new_names))
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+    def test_menu_page_renders_srcset(self):
+        self.make_item()
+        response = self.client.get(reverse('menu'))
+        self.assertContains(response, 'srcset=')
+
+    def test_modern_formats_are_offered_before_jpeg(self):
+        item = self.make_item()
+        expected = [mime for key, mime in MIME_TYPES.items() if key != 'jpeg' and key in item.image_variants]
+        self.assertIn('image/webp', expected)
+        self.assertEqual([source['type'] for source in item.get_image_sources()], expected)
+        jpeg_sizes = {width: item.image.storage.size(name) for width, name in item.image_variants['jpeg']}
+        for width, name in item.image_variants['webp']:
+            self.assertLess(item.image.storage.size(name), jpeg_sizes[width])
+        self.assertTrue(item.get_image_url().endswith('-960w.jpg'))
+
+        response = self.client.get(reverse('menu'))
+        self.assertContains(response, '<source type="image/webp"')
+
+    def test_budget_lowers_quality_until_it_fits(self):
+        image = Image.effect_noise((320, 240), 80).convert('RGB')
+        options = {'optimize': True}
+        generous = encode_within_budget(image, 'JPEG', (90, 50, 20), options, budget=10**7)
+        tight = encode_within_budget(image, 'JPEG', (90, 50, 20), options, budget=1)
+        self.assertLess(len(tight), len(generous))
+
+
+# ---------- Media Serving ----------
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, DEBUG=False)
+class ServeMediaTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        os.makedirs(os.path.join(TEST_MEDIA_ROOT, 'menu_images'), exist_ok=True)
+        with open(os.path.join(TEST_MEDIA_ROOT, 'menu_images', 'plain.jpg'), 'wb') as fh:
+            fh.write(self.content)
+
+    def get(self, path='/media/menu_images/plain.jpg', **headers):
+        response = self.client.get(path, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_file_with_validators_and_short_cache(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}')
+        self.assertIn('ETag', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_versioned_urls_are_immutable_only_for_the_current_content(self):
+        digest = content_digest([self.content])
+        response, _ = self.get(f'/media/menu_images/plain.jpg?v={digest}')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable')
+
+        etag = response['ETag'].strip('"')
+        self.assertIn('immutable', self.get(f'/media/menu_images/plain.jpg?v={etag}')[0]['Cache-Control'])
+
+        response, _ = self.get('/media/menu_images/plain.jpg?v=0123456789ab')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}')
+
+    def test_version_of_rewritten_file_is_no_longer_immutable(self):
+        digest = content_digest([self.content])
+        path = os.path.join(TEST_MEDIA_ROOT, 'menu_images', 'plain.jpg')
+        with open(path, 'wb') as fh:
+            fh.write(self.content[::-1])
+        os.utime(path, ns=(0, 0))  # a new mtime, whatever the filesystem's timestamp resolution
+        response, _ = self.get(f'/media/menu_images/plain.jpg?v={digest}')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_byte_ranges(self):
+        response, body = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response, body = self.get(Range='bytes=-5')
+        self.assertEqual(body, self.content[-5:])
+
+        response, _ = self.get(Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_stale_if_range_sends_whole_file(self):
+        response, body = self.get(Range='bytes=0-9', If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_missing_and_escaping_paths_are_not_found(self):
+        self.assertEqual(self.get('/media/menu_images/nope.jpg')[0].status_code, 404)
+        self.assertEqual(self.get('/media/../manage.py')[0].status_code, 404)
+        self.assertEqual(self.get('/media/menu_images')[0].status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_sendfile_header_hands_off_transfer(self):
+        response, body = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/menu_images/plain.jpg')
+        self.assertEqual(body, b'')
+
+
+# ---------- Admin Dashboard ----------
+class DashboardStatsTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='erin', password='secret123')
+        self.menu = {item.id: item for item in make_menu(3)}
+        self.client.force_login(self.user)
+
+    def place_orders(self, count):
+        return [
+            create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+            for _ in range(count)
+        ]
+
+    def assertStatsMatchTables(self):
+        stats = get_dashboard_stats()
+        expected = compute_dashboard_stats()
+        self.assertEqual(stats.total_orders, expected['total_orders'])
+        self.assertEqual(stats.completed_revenue, expected['completed_revenue'])
+        self.assertEqual(stats.pending_payments, expected['pending_payments'])
+        self.assertEqual(stats.menu_items, expected['menu_items'])
+
+    def test_rollup_follows_orders_and_payments(self):
+        first, second = self.place_orders(2)
+        self.assertStatsMatchTables()
+
+        payment = Payment.objects.get(order=first)
+        payment.status = 'Completed'
+        payment.save()
+        self.assertStatsMatchTables()
+        self.assertEqual(get_dashboard_stats().completed_revenue, first.total_amount)
+
+        # Saving again without a change must not count the revenue twice
+        payment.save()
+        second.delete()
+        MenuItem.objects.first().delete()
+        self.assertStatsMatchTables()
+
+    def test_rebuild_repairs_bulk_writes(self):
+        self.place_orders(3)
+        Payment.objects.update(status='Completed')
+        rebuild_dashboard_stats()
+        self.assertStatsMatchTables()
+        self.assertEqual(get_dashboard_stats().pending_payments, 0)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant_as_orders_grow(self):
+        self.place_orders(2)
+        few = self.count_queries()
+        self.place_orders(20)
+        self.assertEqual(self.count_queries(), few)
+
+
+# ---------- Django Admin ----------
+class AdminChangelistQueryTests(KitcharyTestCase):
+    CHANGELISTS = ('admin:core_order_changelist', 'admin:core_payment_changelist', 'admin:core_orderitem_changelist')
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='root', password='secret123')
+        self.menu = {item.id: item for item in make_menu(3)}
+        self.client.force_login(self.admin)
+
+    def place_orders(self, count):
+        for _ in range(count):
+            customer = User.objects.create_user(username=f'guest{Order.objects.count()}')
+            create_order(customer, {item_id: 1 for item_id in self.menu}, self.menu)
+
+    def count_queries(self, url_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_query_count_is_bounded(self):
+        self.place_orders(2)
+        few = {name: self.count_queries(name) for name in self.CHANGELISTS}
+        self.place_orders(15)
+        for name in self.CHANGELISTS:
+            with self.subTest(changelist=name):
+                self.assertEqual(self.count_queries(name), few[name])
+
+    def test_order_changelist_shows_latest_payment_status(self):
+        self.place_orders(1)
+        Payment.objects.update(status='Completed')
+        response = self.client.get(reverse('admin:core_order_changelist'))
+        self.assertContains(response, 'Paid')
+        self.assertNotContains(response, '⏳ Pending')
+
+
+# ---------- Kitchen Queue ----------
+class KitchenQueueTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(username='frank', password='secret123')
+        self.cook = User.objects.create_user(username='cook', password='secret123', is_staff=True)
+        self.menu = {item.id: item for item in make_menu(3)}
+        self.client.force_login(self.cook)
+
+    def place_orders(self, count):
+        return [
+            create_order(self.customer, {item_id: 1 for item_id in self.menu}, self.menu)
+            for _ in range(count)
+        ]
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('kitchen_queue'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant_as_tickets_grow(self):
+        self.place_orders(2)
+        few = self.count_queries()
+        self.place_orders(20)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_board_groups_tickets_by_status_oldest_first(self):
+        first, second, third = self.place_orders(3)
+        Order.objects.filter(pk=first.pk).update(status=Order.SERVED)
+        Order.objects.filter(pk=third.pk).update(status=Order.COOKING)
+        response = self.client.get(reverse('kitchen_queue'))
+        columns = {label: [order.pk for order in tickets] for label, tickets in response.context['columns']}
+        self.assertEqual(columns, {'Placed': [second.pk], 'Accepted': [], 'Cooking': [third.pk], 'Ready': []})
+
+    def test_advance_walks_the_lifecycle_once(self):
+        order, = self.place_orders(1)
+        self.assertEqual(order.status, Order.PLACED)
+        self.assertEqual(advance_order(order.pk, Order.PLACED), Order.ACCEPTED)
+        # A second screen pressing the same button is a no-op
+        self.assertIsNone(advance_order(order.pk, Order.PLACED))
+        for status in (Order.ACCEPTED, Order.COOKING, Order.READY):
+            advance_order(order.pk, status)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.SERVED)
+        self.assertIsNone(advance_order(order.pk, Order.SERVED))
+
+    def test_advance_view(self):
+        order, = self.place_orders(1)
+        response = self.client.post(reverse('kitchen_advance', args=[order.pk]), {'status': Order.PLACED})
+        self.assertRedirects(response, reverse('kitchen_queue'), fetch_redirect_response=False)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.ACCEPTED)
+
+    def test_customers_cannot_see_the_queue(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('kitchen_queue'))
+        self.assertEqual(response.status_code, 302)
+
+
+# ---------- Async Views ----------
+class AsyncViewTests(KitcharyTestCase):
+    """The async views must run under ASGI without touching the DB from the event loop"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='ivan', password='secret123', is_superuser=True)
+        self.menu = {item.id: item for item in make_menu(3)}
+        self.order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+
+    async def get(self, url_name):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    async def test_menu(self):
+        response = await self.get('menu')
+        self.assertContains(response, 'Dish 2')
+
+    async def test_order_list(self):
+        response = await self.get('order_list')
+        self.assertContains(response, f'data-order-id="{self.order.pk}"')
+
+    async def test_payment_list(self):
+        response = await self.get('payment_list')
+        self.assertContains(response, f'#{self.order.pk}</td>')
+
+    async def test_admin_dashboard(self):
+        response = await self.get('admin_dashboard')
+        self.assertEqual(response.context['total_orders'], 1)
+        self.assertContains(response, 'ivan')
+
+    async def test_asgi_runs_the_async_view(self):
+        with mock.patch('core.views.arender', wraps=views.arender) as arender:
+            await self.get('menu')
+        arender.assert_called_once()
+
+    def test_wsgi_runs_the_sync_twin(self):
+        self.client.force_login(self.user)
+        with mock.patch('core.views.arender') as arender:
+            self.assertContains(self.client.get(reverse('menu')), 'Dish 2')
+        arender.assert_not_called()
+        for url_name in ('order_list', 'payment_list', 'admin_dashboard'):
+            response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200, url_name)
+            self.assertContains(response, f'{self.order.pk}')
+
+    def test_twins_can_be_turned_off(self):
+        with override_settings(WSGI_SYNC_VIEWS=False), \
+                mock.patch('core.views.arender', wraps=views.arender) as arender:
+            self.client.get(reverse('menu'))
+        arender.assert_called_once()
+
+
+# ---------- Conditional GET ----------
+class ConditionalGetTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='judy', password='secret123')
+        self.client.force_login(self.user)
+        self.menu = {item.id: item for item in make_menu(2)}
+        self.order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+
+    def etag(self, url_name):
+        # The first response sets the CSRF cookie, which the ETag covers
+        self.client.get(reverse(url_name))
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response['ETag']
+
+    def revalidate(self, url_name, etag):
+        return self.client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_rendered(self):
+        # Session and user, then one aggregate per table the page shows
+        for url_name, queries in (('menu', 2), ('order_list', 4), ('payment_list', 3)):
+            etag = self.etag(url_name)
+            with self.assertNumQueries(queries):
+                response = self.revalidate(url_name, etag)
+            self.assertEqual(response.status_code, 304, url_name)
+            self.assertEqual(response['ETag'], etag)
+            self.assertFalse(response.templates)
+
+    def test_menu_change_invalidates_menu_and_orders(self):
+        etags = {url_name: self.etag(url_name) for url_name in ('menu', 'order_list')}
+        MenuItem.objects.create(name='Mango Lassi', price=Decimal('3.00'))
+        for url_name, etag in etags.items():
+            self.assertEqual(self.revalidate(url_name, etag).status_code, 200, url_name)
+
+    def test_kitchen_progress_invalidates_order_list(self):
+        etag = self.etag('order_list')
+        advance_order(self.order.pk, Order.PLACED)
+        response = self.revalidate('order_list', etag)
+        self.assertContains(response, 'Accepted')
+
+    def test_payment_invalidates_both_histories(self):
+        etags = {url_name: self.etag(url_name) for url_name in ('order_list', 'payment_list')}
+        complete_payment(self.user, self.order)
+        for url_name, etag in etags.items():
+            self.assertContains(self.revalidate(url_name, etag), 'Paid' if url_name == 'order_list' else 'Completed')
+
+    def test_admin_status_edit_invalidates_both_histories(self):
+        # An admin edit changes the status but not payment_date
+        etags = {url_name: self.etag(url_name) for url_name in ('order_list', 'payment_list')}
+        payment = Payment.objects.get(order=self.order)
+        payment.status = 'Completed'
+        payment.save()
+        for url_name, etag in etags.items():
+            self.assertEqual(self.revalidate(url_name, etag).status_code, 200, url_name)
+
+    def test_line_item_edit_invalidates_order_list(self):
+        etag = self.etag('order_list')
+        line = OrderItem.objects.filter(order=self.order).first()
+        line.quantity = 5
+        line.save()
+        self.assertEqual(self.revalidate('order_list', etag).status_code, 200)
+        etag = self.etag('order_list')
+        line.delete()
+        self.assertEqual(self.revalidate('order_list', etag).status_code, 200)
+
+    def test_order_list_has_no_last_modified(self):
+        # Menu edits have no timestamp, so If-Modified-Since alone can't be trusted there
+        self.client.get(reverse('order_list'))
+        response = self.client.get(reverse('order_list'))
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Last-Modified', self.client.get(reverse('payment_list')))
+
+    def test_other_user_gets_own_page(self):
+        etag = self.etag('order_list')
+        self.client.force_login(User.objects.create_user(username='mallory', password='secret123'))
+        self.assertEqual(self.revalidate('order_list', etag).status_code, 200)
+
+    def test_pending_messages_force_a_render(self):
+        etag = self.etag('payment_list')
+        self.client.post(reverse('payment', args=[self.order.pk]), {'idempotency_key': 'k1'})
+        response = self.revalidate('payment_list', etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# ---------- Live Order Events ----------
+class BrokerTests(TestCase):
+    def test_publish_from_another_thread_reaches_the_subscriber(self):
+        async def scenario():
+            stream = event_stream(user_id=42)
+            self.assertEqual(await anext(stream), 'retry: 5000\n\n')
+            self.assertTrue(broker.has_subscribers(42))
+            publisher = threading.Thread(target=broker.publish, args=(42, {'type': 'order', 'order_id': 7, 'status': 'ready'}))
+            publisher.start()
+            message = await asyncio.wait_for(anext(stream), 1)
+            publisher.join()
+            await stream.aclose()
+            return message
+
+        message = asyncio.run(scenario())
+        event_line, data_line = message.strip().split('\n')
+        self.assertEqual(event_line, 'event: order')
+        self.assertEqual(json.loads(data_line[len('data: '):])['status'], 'ready')
+        self.assertFalse(broker.has_subscribers(42))
+
+
+class OrderEventPublishingTests(KitcharyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='gina', password='secret123')
+        self.menu = {item.id: item for item in make_menu(2)}
+        self.published = []
+        self.subscription = mock.patch.object(broker, 'has_subscribers', return_value=True)
+        self.publish = mock.patch.object(broker, 'publish', side_effect=lambda user_id, event: self.published.append((user_id, event)))
+        self.subscription.start()
+        self.publish.start()
+        self.addCleanup(self.subscription.stop)
+        self.addCleanup(self.publish.stop)
+
+    def test_events_are_published_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        self.assertEqual(self.published, [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual([event['type'] for _, event in self.published], ['order', 'payment'])
+        self.assertTrue(all(user_id == self.user.pk for user_id, _ in self.published))
+        self.assertEqual(self.published[1][1]['order_id'], order.pk)
+
+    def test_completing_a_payment_publishes_once(self):
+        order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        other = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        Payment.objects.filter(order=other).delete()
+        self.published.clear()
+        for paid in (order, other):  # update path, then create path
+            with self.captureOnCommitCallbacks(execute=True):
+                complete_payment(self.user, paid)
+        self.assertEqual(
+            [(event['order_id'], event['status']) for _, event in self.published],
+            [(order.pk, 'Completed'), (other.pk, 'Completed')],
+        )
+
+    def test_kitchen_advance_publishes_new_status(self):
+        order = create_order(self.user, {item_id: 1 for item_id in self.menu}, self.menu)
+        self.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            advance_order(order.pk, Order.PLACED)
+        self.assertEqual(self.published, [(self.user.pk, {'type': 'order', 'order_id': order.pk, 'status': Order.ACCEPTED})])
+
+
+class OrderEventsViewTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hana', password='secret123')
+
+    def test_wsgi_requests_get_no_content(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('order_events'))
+        self.assertEqual(response.status_code, 204)
+
+    def test_asgi_request_streams_events(self):
+        async def scenario():
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get(reverse('order_events'))
+            stream = aiter(response.streaming_content)
+            first = await anext(stream)
+            broker.publish(self.user.pk, {'type': 'payment', 'payment_id': 1, 'order_id': 2, 'status': 'Completed'})
+            second = await asyncio.wait_for(anext(stream), 1)
+            await stream.aclose()
+            return response, first, second
+
+        response, first, second = asyncio.run(scenario())
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(first, b'retry: 5000\n\n')
+        self.assertTrue(second.startswith(b'event: payment\n'))
+
+
+# ---------- Load Test Command ----------
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadTestCommandTests(LiveServerTestCase):
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        invalidate_menu()
+        make_menu(3)
+
+    def test_virtual_users_complete_checkouts(self):
+        out = io.StringIO()
+        call_command('load_test', url=self.live_server_url, users=3, checkouts=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn('6 checkouts', output)
+        self.assertIn('error rate 0.00%', output)
+        self.assertIn('POST payment', output)
+        self.assertEqual(Payment.objects.filter(status='Completed', user__username__startswith='load_').count(), 6)
+
+    def test_unreachable_server_is_reported_as_errors(self):
+        out = io.StringIO()
+        call_command('load_test', url='http://127.0.0.1:9', users=1, checkouts=1, timeout=2, stdout=out)
+        self.assertIn('0 checkouts', out.getvalue())
+        self.assertIn('error rate 100.00%', out.getvalue())
+
+
+# ---------- Seed Command ----------
+class SeedCommandTests(KitcharyTestCase):
+    def seed(self, **options):
+        call_command('seed', users=5, menu_items=4, orders=60, seed=7, stdout=io.StringIO(), **options)
+
+    def test_generates_consistent_history(self):
+        self.seed()
+        self.assertEqual(Order.objects.count(), 60)
+        self.assertEqual(MenuItem.objects.count(), 4 + 6)  # plus the demo dishes
+        self.assertEqual(User.objects.filter(userprofile__role='customer').count(), 5 + 1)
+        for order in Order.objects.with_items()[:10]:
+            self.assertEqual(
+                order.total_amount,
+                sum(line.menu_item.price * line.quantity for line in order.orderitem_set.all()),
+            )
+        # Timestamps are spread over the history, not stamped with the insert time
+        oldest = Order.objects.order_by('created_at').first().created_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=7))
+        self.assertTrue(Order._meta.get_field('created_at').auto_now_add)
+        self.assertTrue(Order._meta.get_field('updated_at').auto_now)
+
+    def test_rollup_and_menu_cache_are_refreshed(self):
+        get_menu()
+        self.seed()
+        stats = get_dashboard_stats()
+        for field, value in compute_dashboard_stats().items():
+            self.assertEqual(getattr(stats, field), value, field)
+        self.assertEqual(len(get_menu()), MenuItem.objects.count())
+
+    def test_demo_accounts_can_log_in_and_reruns_add_data(self):
+        self.seed()
+        self.seed()
+        self.assertTrue(self.client.login(username='customer', password='customer123'))
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
+        self.assertEqual(Order.objects.count(), 120)
+
+
+# ---------- Database Settings ----------
+class DatabaseSettingsTests(SimpleTestCase):
+    def test_defaults(self):
+        db = database_settings({})['default']
+        self.assertEqual(db['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(db['NAME'], BASE_DIR / 'db.sqlite3')
+        self.assertEqual(db['CONN_MAX_AGE'], 0)
+        self.assertIs(db['CONN_HEALTH_CHECKS'], True)
+        self.assertEqual(db['OPTIONS'], {'transaction_mode': 'IMMEDIATE'})
+
+    def test_sqlite_overrides(self):
+        db = database_settings({
+            'KITCHARY_DB_PATH': '/tmp/scratch.sqlite3',
+            'KITCHARY_DB_CONN_MAX_AGE': '60',
+            'KITCHARY_DB_CONN_HEALTH_CHECKS': '0',
+            'KITCHARY_SQLITE_TUNING': '0',
+        })['default']
+        self.assertEqual(db['NAME'], '/tmp/scratch.sqlite3')
+        self.assertEqual(db['CONN_MAX_AGE'], 60)
+        self.assertIs(db['CONN_HEALTH_CHECKS'], False)
+        self.assertNotIn('OPTIONS', db)
+
+    def test_postgresql_without_pool(self):
+        db = database_settings({
+            'KITCHARY_DB_ENGINE': 'postgresql',
+            'KITCHARY_DB_HOST': 'db.internal',
+            'KITCHARY_DB_CONN_MAX_AGE': '60',
+        })['default']
+        self.assertEqual(db['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((db['NAME'], db['USER'], db['HOST'], db['PORT']), ('kitchary', 'kitchary', 'db.internal', '5432'))
+        self.assertEqual(db['CONN_MAX_AGE'], 60)
+        self.assertNotIn('OPTIONS', db)  # no pool, and no SQLite transaction mode
+
+    def test_postgresql_pool_is_opt_in_and_owns_connection_lifetime(self):
+        db = database_settings({
+            'KITCHARY_DB_ENGINE': 'postgresql',
+            'KITCHARY_DB_POOL': '1',
+            'KITCHARY_DB_POOL_MAX': '20',
+            'KITCHARY_DB_CONN_MAX_AGE': '60',
+        })['default']
+        self.assertEqual(db['CONN_MAX_AGE'], 0)
+        self.assertEqual(db['OPTIONS'], {'pool': {'min_size': 2, 'max_size': 20, 'timeout': 10}})
+
+    def test_pool_is_ignored_for_sqlite(self):
+        db = database_settings({'KITCHARY_DB_POOL': '1', 'KITCHARY_DB_CONN_MAX_AGE': '60'})['default']
+        self.assertEqual(db['CONN_MAX_AGE'], 60)
+        self.assertNotIn('pool', db['OPTIONS'])
+
+
+# ---------- SQLite Tuning ----------
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+            self.skipTest("SQLite tuning disabled")
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_pragma_values_are_validated(self):
+        self.assertEqual(pragma_statements({'cache_size': -2000}), ['PRAGMA cache_size = -2000'])
+        with self.assertRaises(ValueError):
+            pragma_statements({'journal_mode': 'WAL; DROP TABLE core_order'})
+
+
+# ---------- Performance Budgets ----------
+# Every route in core.urls, requested once with cold caches against the
+# seeded volume below. queries is an exact ceiling: a view whose query
+# count grows with the data (an N+1) blows it. ms is wall-clock time
+# through the test client; it depends on the machine, so it is only
+# checked with KITCHARY_TIMING_BUDGETS=1 (on a quiet, known machine).
+Budget = namedtuple('Budget', 'url_name method user queries ms args data', defaults=(None, None))
+
+CUSTOMER, ADMIN, STAFF, ANONYMOUS = 'customer', 'admin', 'staff', None
+TIMING_BUDGETS = os.environ.get('KITCHARY_TIMING_BUDGETS') == '1'
+
+PERFORMANCE_BUDGETS = [
+    Budget('menu', 'get', CUSTOMER, 3, 200),
+    Budget('signup_view', 'get', ANONYMOUS, 0, 200),
+    Budget('signup_view', 'post', ANONYMOUS, 8, 300,
+           data=lambda t: {'username': 'newbie', 'email': 'newbie@example.com',
+                           'password1': 'Gr8-curry-night', 'password2': 'Gr8-curry-night', 'role': 'customer'}),
+    Budget('login', 'get', ANONYMOUS, 0, 200),
+    Budget('login', 'post', ANONYMOUS, 11, 300,
+           data=lambda t: {'username': 'budget_customer', 'password': 'secret123'}),
+    Budget('logout', 'get', CUSTOMER, 4, 200),
+    Budget('dashboard', 'get', CUSTOMER, 3, 200),
+    Budget('admin_dashboard', 'get', ADMIN, 5, 200),
+    Budget('customer_dashboard', 'get', CUSTOMER, 2, 200),
+    Budget('order_list', 'get', CUSTOMER, 6, 300),
+    Budget('place_order', 'get', CUSTOMER, 3, 300),
+    Budget('place_order', 'post', CUSTOMER, 14, 300,
+           data=lambda t: {t.item_field: 2, 'idempotency_key': 'budget-order'}),
+    Budget('order_confirmation', 'get', CUSTOMER, 5, 200, args=lambda t: [t.order.pk]),
+    Budget('payment', 'get', CUSTOMER, 6, 200, args=lambda t: [t.order.pk]),
+    Budget('payment', 'post', CUSTOMER, 16, 300,
+           args=lambda t: [t.order.pk], data=lambda t: {'idempotency_key': 'budget-payment'}),
+    Budget('payment_success', 'get', CUSTOMER, 3, 200, args=lambda t: [t.payment.pk]),
+    Budget('payment_list', 'get', CUSTOMER, 4, 300),
+    Budget('order_events', 'get', CUSTOMER, 2, 200),
+    Budget('kitchen_queue', 'get', STAFF, 7, 300),
+    Budget('kitchen_advance', 'post', STAFF, 4, 200,
+           args=lambda t: [t.queued_order.pk], data=lambda t: {'status': Order.PLACED}),
+]
+
+# Seeded volume: enough that per-row queries would stand out
+BUDGET_MENU_ITEMS = 40
+BUDGET_CUSTOMERS = 20
+BUDGET_ORDERS = 2000
+BUDGET_ITEMS_PER_ORDER = 3
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PerformanceBudgetTests(KitcharyTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        menu = MenuItem.objects.bulk_create([
+            MenuItem(name=f'Budget Dish {i}', description='House special', price=Decimal('50.00') + i)
+            for i in range(BUDGET_MENU_ITEMS)
+        ])
+        cls.users = {
+            CUSTOMER: User.objects.create_user(username='budget_customer', password='secret123'),
+            ADMIN: User.objects.create_superuser(username='budget_admin', password='secret123'),
+            STAFF: User.objects.create_user(username='budget_staff', password='secret123', is_staff=True),
+        }
+        customers = [cls.users[CUSTOMER]] + [
+            User.objects.create_user(username=f'budget_{i}') for i in range(BUDGET_CUSTOMERS - 1)
+        ]
+        # Half the orders belong to the customer under test, so their pages are the long ones
+        orders = Order.objects.bulk_create([
+            Order(
+                user=customers[0] if i % 2 else customers[i % len(customers)],
+                total_amount=Decimal('150.00'),
+                status=Order.KITCHEN_STATUSES[i % 4] if i >= BUDGET_ORDERS - 40 else Order.SERVED,
+            )
+            for i in range(BUDGET_ORDERS)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=menu[(i + j) % len(menu)], quantity=1 + j)
+            for i, order in enumerate(orders)
+            for j in range(BUDGET_ITEMS_PER_ORDER)
+        ])
+        Payment.objects.bulk_create([
+            Payment(user=order.user, order=order, amount=order.total_amount,
+                    status='Completed' if i % 3 else 'Pending')
+            for i, order in enumerate(orders[:-1])
+        ])
+        # bulk_create sends no signals
+        rebuild_dashboard_stats()
+
+        cls.order = orders[-1]  # unpaid, so the payment page can complete it
+        cls.payment = Payment.objects.filter(user=cls.users[CUSTOMER]).latest('id')
+        cls.queued_order = Order.objects.filter(status=Order.PLACED).earliest('id')
+        cls.item_field = f'item_{menu[0].pk}'
+
+    def request(self, budget):
+        client = self.client_class()
+        user = self.users.get(budget.user)
+        if user is not None:
+            client.force_login(user)
+        url = reverse(budget.url_name, args=budget.args(self) if budget.args else None)
+        data = budget.data(self) if budget.data else {}
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = getattr(client, budget.method)(url, data)
+            elapsed = (time.perf_counter() - started) * 1000
+        return response, ctx.captured_queries, elapsed
+
+    def test_every_route_has_a_budget(self):
+        routes = {
+            pattern.name for pattern in get_resolver('core.urls').url_patterns
+        }
+        self.assertEqual(routes, {budget.url_name for budget in PERFORMANCE_BUDGETS})
+
+    def test_views_stay_within_budget(self):
+        for budget in PERFORMANCE_BUDGETS:
+            with self.subTest(f'{budget.method.upper()} {budget.url_name}'):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                response, queries, elapsed = self.request(budget)
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(
+                    len(queries), budget.queries,
+                    '\n'.join(q['sql'] for q in queries),
+                )
+                if TIMING_BUDGETS:
+                    self.assertLessEqual(elapsed, budget.ms, f'{elapsed:.0f} ms')
@@ -23,4 +23,11 @@ urlpatterns = [
     path('payment/<int:order_id>/', views.make_payment, name='payment'),
     path('payment/success/<int:payment_id>/', views.payment_success, name='payment_success'),
     path('payments/', views.payment_list, name='payment_list'),
+
+    # Live updates (Server-Sent Events, needs ASGI)
+    path('events/', views.order_events, name='order_events'),
+
+    # Kitchen
+    path('kitchen/', views.kitchen_queue, name='kitchen_queue'),
+    path('kitchen/<int:order_id>/advance/', views.kitchen_advance, name='kitchen_advance'),
 ]
@@ -1,17 +1,14 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .forms import SignUpForm
-from .models import MenuItem, Order, Payment, UserProfile
+from .models import Order, OrderItem, Payment, UserProfile
 from django.contrib.auth.models import User
-from django.db.models import Sum
 from django.http import HttpResponse
-from django.template.loader import get_template
 
 
 # ---------- Signals for UserProfile creation ----------
@@ -27,13 +24,39 @@ def save_user_profile(sender, instance, **kwargs):
         instance.userprofile.save()
 
 
+# ---------- Async Rendering ----------
+# menu_view, order_list, payment_list and admin_dashboard are async: under
+# ASGI (see KITCHARY_final/asgi.py) one worker keeps serving other clients
+# while they wait on the database or a slow client. Each has a sync twin
+# that serves WSGI requests (see core.middleware); both build their context
+# with the same ``*_context(request)`` function.
+async def arender(request, template_name, get_context):
+    """render() for async views: loads the user, then runs ``get_context(request)``
+    (the page's queries) in a thread, so nothing queries from the event loop"""
+    request.user = await request.auser()
+    context = await sync_to_async(get_context)(request)
+    return render(request, template_name, context)
+
+
 # ---------- Menu View ----------
-from django.shortcuts import render
-from .models import MenuItem
+from .menu_cache import get_menu_grid
+from .conditional import conditional_page, menu_validators, order_validators, payment_validators
+from .middleware import sync_twin
+
+
+def menu_context(request):
+    return {'menu_grid': get_menu_grid()}
+
+
+@conditional_page(menu_validators)
+def sync_menu_view(request):
+    return render(request, 'core/menu.html', menu_context(request))
+
 
-def menu_view(request):
-    menu_items = MenuItem.objects.all()
-    return render(request, 'core/menu.html', {'menu_items': menu_items})
+@sync_twin(sync_menu_view)
+@conditional_page(menu_validators)
+async def menu_view(request):
+    return await arender(request, 'core/menu.html', menu_context)
 
 
 # ---------- Signup ----------
@@ -95,9 +118,6 @@ def login_view(request):
 
 
 # ---------- Logout ----------
-from django.contrib import messages
-from django.contrib.auth import logout
-
 def custom_logout_view(request):
     logout(request)
     messages.success(request, "You have been logged out.")
@@ -120,25 +140,30 @@ def dashboard_redirect(request):
 
 
 
-from django.db.models import Sum
+from .stats import get_dashboard_stats
 
-@login_required
-def admin_dashboard(request):
-    total_orders = Order.objects.count()
-    total_revenue = Payment.objects.filter(status='Completed').aggregate(Sum('amount'))['amount__sum'] or 0
-    pending_payments = Payment.objects.filter(status='Pending').count()
-    menu_items = MenuItem.objects.count()
-    
-    recent_orders = Order.objects.all().order_by('-created_at')[:5]
-
-    context = {
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
-        'pending_payments': pending_payments,
-        'menu_items': menu_items,
-        'recent_orders': recent_orders,
+
+def admin_dashboard_context(request):
+    # KPIs come from the DashboardStats rollup (one row) instead of full-table aggregates
+    stats = get_dashboard_stats()
+    return {
+        'total_orders': stats.total_orders,
+        'total_revenue': stats.completed_revenue,
+        'pending_payments': stats.pending_payments,
+        'menu_items': stats.menu_items,
+        'recent_orders': list(Order.objects.select_related('user').with_payments().order_by('-created_at')[:5]),
     }
-    return render(request, 'core/admin_dashboard.html', context)
+
+
+@login_required
+def sync_admin_dashboard(request):
+    return render(request, 'core/admin_dashboard.html', admin_dashboard_context(request))
+
+
+@sync_twin(sync_admin_dashboard)
+@login_required
+async def admin_dashboard(request):
+    return await arender(request, 'core/admin_dashboard.html', admin_dashboard_context)
 
 @login_required
 def customer_dashboard(request):
@@ -146,45 +171,70 @@ def customer_dashboard(request):
 
 
 # ---------- Place Order ----------
-from django.shortcuts import render, redirect, get_object_or_404
-from .models import MenuItem, Order, OrderItem, Payment
 from .forms import OrderForm
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
+from .services import (
+    EmptyOrderError, IdempotencyKeyReusedError, complete_payment, create_order,
+    find_idempotent_result, run_idempotent,
+)
+from .pagination import ORDERS_PAGE_SIZE, PAYMENTS_PAGE_SIZE, keyset_paginate
+
+import hashlib
+import uuid
+from django.urls import reverse
+
+
+def get_idempotency_key(request):
+    """The key a checkout form (hidden field) or API client (header) sent, if any"""
+    return request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key')
+
+
+def cart_fingerprint(request):
+    """Hash of the quantities an order POST asks for, to tell a retry from a reused key"""
+    cart = sorted(
+        (name, value.strip()) for name, value in request.POST.items()
+        if name.startswith('item_') and value.strip() not in ('', '0')
+    )
+    return hashlib.sha256(repr(cart).encode()).hexdigest()
+
+
+def key_reused_response(exc):
+    # 422: the key is fine, but it belongs to another request
+    return HttpResponse(str(exc), status=422, content_type='text/plain')
 
-from decimal import Decimal
-from .models import Payment
 
 @login_required
 def place_order(request):
     if request.method == 'POST':
+        # A double-click or retry replays the first result in one indexed lookup
+        key = get_idempotency_key(request)
+        fingerprint = cart_fingerprint(request)
+        try:
+            replay = find_idempotent_result(request.user, 'place_order', key, fingerprint)
+        except IdempotencyKeyReusedError as exc:
+            return key_reused_response(exc)
+        if replay:
+            return redirect(replay)
+
         form = OrderForm(request.POST)
         if form.is_valid():
-            order = Order.objects.create(user=request.user, total_amount=0)
-            total = 0
-            for item in MenuItem.objects.all():
-                quantity = form.cleaned_data.get(f'item_{item.id}')
-                if quantity and quantity > 0:
-                    OrderItem.objects.create(order=order, menu_item=item, quantity=quantity)
-                    total += item.price * quantity
-
-            if total == 0:
-                order.delete()
-                messages.error(request, "Please select at least one item to order.")
+            def place():
+                order = create_order(
+                    request.user,
+                    form.get_quantities(),
+                    form.get_menu_items(),
+                )
+                return reverse('payment', args=[order.id])
+
+            try:
+                payment_url = run_idempotent(request.user, 'place_order', key, place, fingerprint)
+            except EmptyOrderError as exc:
+                messages.error(request, str(exc))
                 return redirect('place_order')
-
-            order.total_amount = total
-            order.save()
-
-            Payment.objects.create(
-                user=request.user,
-                order=order,
-                amount=total,
-                status='Pending'
-            )
+            except IdempotencyKeyReusedError as exc:
+                return key_reused_response(exc)
 
             print("✅ Redirecting to payment page...")
-            return redirect('payment', order_id=order.id)
+            return redirect(payment_url)
 
         else:
             print("❌ Form errors:", form.errors)
@@ -192,8 +242,7 @@ def place_order(request):
     else:
         form = OrderForm()
 
-    # Pass menu items to template for displaying images
-    menu_items = MenuItem.objects.all()
+    # Pair each field with its menu item (from the form's menu snapshot) for images
     form_fields_with_items = []
     
     for field in form:
@@ -207,61 +256,81 @@ def place_order(request):
 
     return render(request, 'core/place_order.html', {
         'form': form,
-        'form_fields_with_items': form_fields_with_items
+        'form_fields_with_items': form_fields_with_items,
+        'idempotency_key': uuid.uuid4().hex,
     })
 
 
 # ---------- List Orders ----------
+def order_list_context(request):
+    orders = (
+        Order.objects.filter(user=request.user)
+        .with_items()
+        .with_payment_status()
+    )
+    page = keyset_paginate(orders, 'created_at', request.GET.get('after'), ORDERS_PAGE_SIZE)
+    return {
+        'orders': page.items,
+        'page': page,
+        'is_first_page': 'after' not in request.GET,
+    }
+
+
+@login_required
+@conditional_page(order_validators)
+def sync_order_list(request):
+    return render(request, 'core/orders.html', order_list_context(request))
+
+
+@sync_twin(sync_order_list)
 @login_required
-def order_list(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'core/orders.html', {'orders': orders})
+@conditional_page(order_validators)
+async def order_list(request):
+    return await arender(request, 'core/orders.html', order_list_context)
 
 
 
 # ---------- Order Confirmation ----------
 @login_required
 def order_confirmation(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(Order.objects.with_items().with_payments(), id=order_id, user=request.user)
     return render(request, 'core/confirmation.html', {'order': order})
 
 
 
 # ---------- Make Payment ----------
-from decimal import Decimal
 @login_required
 def make_payment(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
-
-    # Check for existing payment
-    payment = Payment.objects.filter(order=order, user=request.user).first()
-
     if request.method == 'POST':
-        if payment:
-            # Update existing payment
-            payment.amount = Decimal(order.total_amount)
-            payment.status = 'Completed'
-            payment.payment_date = timezone.now()
-            payment.save()
-        else:
-            # Create new if missing (for safety)
-            payment = Payment.objects.create(
-                user=request.user,
-                order=order,
-                amount=Decimal(order.total_amount),
-                status='Completed',
-                payment_date=timezone.now()
-            )
+        # Scoped to the order: a key reused for another order is a new payment
+        key = get_idempotency_key(request)
+        scope = f'make_payment:{order_id}'
+        replay = find_idempotent_result(request.user, scope, key)
+        if replay:
+            return redirect(replay)
+
+        order = get_object_or_404(Order, id=order_id, user=request.user)
+
+        def pay():
+            payment, changed = complete_payment(request.user, order)
+            if changed:
+                messages.success(request, 'Payment successful!')
+            else:
+                messages.info(request, 'This order was already paid.')
+            return reverse('payment_success', args=[payment.id])
+
+        return redirect(run_idempotent(request.user, scope, key, pay))
 
-        messages.success(request, 'Payment successful!')
-        return redirect('payment_success', payment_id=payment.id)
+    # The page lists the order's items and its payment
+    order = get_object_or_404(Order.objects.with_items().with_payments(), id=order_id, user=request.user)
 
-    # Payment history
-    payment_history = Payment.objects.filter(user=request.user).order_by('-payment_date')
+    # Payment history (only the rows the page shows)
+    payment_history = Payment.objects.filter(user=request.user).order_by('-payment_date', '-id')[:5]
 
     return render(request, 'core/make_payment.html', {
         'order': order,
-        'payment_history': payment_history
+        'payment_history': payment_history,
+        'idempotency_key': uuid.uuid4().hex,
     })
 
 
@@ -273,12 +342,92 @@ def payment_success(request, payment_id):
 
 
 # ---------- Payment List View (Optional if using only make_payment) ----------
+def payment_list_context(request):
+    payments = Payment.objects.filter(user=request.user)
+    page = keyset_paginate(payments, 'payment_date', request.GET.get('after'), PAYMENTS_PAGE_SIZE)
+    return {
+        'payment_history': page.items,
+        'page': page,
+        'is_first_page': 'after' not in request.GET,
+    }
+
+
+@login_required
+@conditional_page(payment_validators)
+def sync_payment_list(request):
+    return render(request, 'core/payments.html', payment_list_context(request))
+
+
+@sync_twin(sync_payment_list)
+@login_required
+@conditional_page(payment_validators)
+async def payment_list(request):
+    return await arender(request, 'core/payments.html', payment_list_context)
+
+
+# ---------- Kitchen Queue ----------
+from django.contrib.auth.decorators import user_passes_test
+from django.db.models import Prefetch, prefetch_related_objects
+from django.views.decorators.http import require_POST
+from .pagination import KITCHEN_QUEUE_SIZE
+from .services import advance_order
+
+
+def is_kitchen_staff(user):
+    if not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    profile = getattr(user, 'userprofile', None)
+    return profile is not None and profile.role == 'admin'
+
+
+@user_passes_test(is_kitchen_staff)
+def kitchen_queue(request):
+    # One column per open status, each an index range scan on order_status_created_idx;
+    # line items for every ticket come from a single prefetch
+    columns = [
+        (label, list(Order.objects.kitchen_queue(status).select_related('user')[:KITCHEN_QUEUE_SIZE]))
+        for status, label in Order.STATUS_CHOICES
+        if status in Order.KITCHEN_STATUSES
+    ]
+    prefetch_related_objects(
+        [order for _, tickets in columns for order in tickets],
+        Prefetch('orderitem_set', queryset=OrderItem.objects.select_related('menu_item')),
+    )
+    return render(request, 'core/kitchen.html', {'columns': columns})
+
+
+@require_POST
+@user_passes_test(is_kitchen_staff)
+def kitchen_advance(request, order_id):
+    current = request.POST.get('status')
+    if advance_order(order_id, current) is None:
+        messages.warning(request, f"Order #{order_id} was already updated.")
+    return redirect('kitchen_queue')
+
+
+# ---------- Live Order Events ----------
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .events import event_stream
+
+
 @login_required
-def payment_list(request):
-    payments = Payment.objects.filter(user=request.user).order_by('-payment_date')
-    return render(request, 'core/payments.html', {'payment_history': payments})
+async def order_events(request):
+    """Stream the user's order and payment status changes as Server-Sent Events"""
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the life of the stream; 204 tells
+        # EventSource not to reconnect, so pages just lose live updates
+        return HttpResponse(status=204)
+    user = await request.auser()
+    response = StreamingHttpResponse(event_stream(user.pk), content_type='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # stop nginx buffering the stream
+    return response
 
 
 # ---------- Media File Handling ----------
-# Media files are now served directly by Django through MEDIA_URL configuration
+# Media files are served by core.media.serve_media (see KITCHARY_final/urls.py)
+# with caching headers, conditional GET and byte ranges
 # Images are properly handled via ImageField in MenuItem model
\ No newline at end of file